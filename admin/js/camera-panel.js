@@ -104,6 +104,18 @@ class CameraPanel {
                 }
             };
         }
+        
+        // Con la pestaña oculta el servidor no necesita dibujar ni codificar el feed
+        document.addEventListener('visibilitychange', () => this.sendPreviewState());
+    }
+    
+    sendPreviewState() {
+        if (this.cameraWs && this.cameraWs.readyState === WebSocket.OPEN) {
+            this.cameraWs.send(JSON.stringify({
+                type: 'set_preview',
+                payload: { enabled: !document.hidden }
+            }));
+        }
     }
     
     async loadCameras() {
@@ -282,18 +294,7 @@ class CameraPanel {
                 canvas.height = imgElement.naturalHeight || 480;
                 ctx.drawImage(imgElement, 0, 0);
                 
-                const frameData = canvas.toDataURL('image/jpeg', this.quality);
-                const base64 = frameData.split(',')[1];
-                
-                this.cameraWs.send(JSON.stringify({
-                    type: 'frame',
-                    payload: {
-                        frame: base64,
-                        width: canvas.width,
-                        height: canvas.height,
-                        timestamp: Date.now()
-                    }
-                }));
+                this.sendFrame(canvas);
                 
             } catch (error) {
                 // CORS error - el navegador no puede leer pixels de imagen cross-origin
@@ -321,11 +322,17 @@ class CameraPanel {
             
             this.cameraWs.onopen = () => {
                 console.log('✅ WebSocket cámara conectado');
+                this.sendPreviewState();
                 resolved = true;
                 resolve();
             };
             
             this.cameraWs.onmessage = (event) => {
+                // Los frames procesados llegan como JPEG binario
+                if (event.data instanceof Blob) {
+                    this.showFrameBlob(event.data);
+                    return;
+                }
                 try {
                     this.handleServerMessage(JSON.parse(event.data));
                 } catch (e) {
@@ -360,6 +367,31 @@ class CameraPanel {
         });
     }
     
+    sendFrame(canvas) {
+        // JPEG binario: sin base64 ni JSON (un 33% menos de bytes)
+        canvas.toBlob((blob) => {
+            if (blob && this.cameraWs && this.cameraWs.readyState === WebSocket.OPEN) {
+                this.cameraWs.send(blob);
+            }
+        }, 'image/jpeg', this.quality);
+    }
+    
+    showFrameBlob(blob) {
+        if (!this.elements.cameraFeed) return;
+        
+        const url = URL.createObjectURL(blob);
+        if (this.frameUrl) {
+            URL.revokeObjectURL(this.frameUrl);
+        }
+        this.frameUrl = url;
+        this.elements.cameraFeed.src = url;
+        
+        // Ocultar overlay del feed procesado
+        if (this.elements.processedOverlay) {
+            this.elements.processedOverlay.classList.add('hidden');
+        }
+    }
+    
     handleServerMessage(message) {
         const { type, payload } = message;
         
@@ -463,20 +495,8 @@ class CameraPanel {
                 // Dibujar frame en canvas
                 ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
                 
-                // Convertir a JPEG base64
-                const frameData = canvas.toDataURL('image/jpeg', this.quality);
-                const base64 = frameData.split(',')[1];
-                
-                // Enviar al servidor
-                this.cameraWs.send(JSON.stringify({
-                    type: 'frame',
-                    payload: {
-                        frame: base64,
-                        width: canvas.width,
-                        height: canvas.height,
-                        timestamp: Date.now()
-                    }
-                }));
+                // Enviar al servidor como JPEG binario
+                this.sendFrame(canvas);
                 
             } catch (error) {
                 console.error('Error capturando frame:', error);
@@ -556,6 +576,10 @@ class CameraPanel {
         if (this.elements.cameraFeed) {
             this.elements.cameraFeed.src = '';
         }
+        if (this.frameUrl) {
+            URL.revokeObjectURL(this.frameUrl);
+            this.frameUrl = null;
+        }
         
         // Mostrar overlays
         if (this.elements.localOverlay) {
@@ -3,6 +3,8 @@ MesaRPG - Script de Inicio del Servidor
 Inicia todos los componentes necesarios
 """
 
+import importlib.util
+import socket
 import subprocess
 import sys
 import os
@@ -11,18 +13,42 @@ import webbrowser
 from pathlib import Path
 
 
+def get_local_ip():
+    """Obtiene la IP local de la interfaz de salida (sin consultar DNS)"""
+    # Un connect() UDP solo selecciona la ruta: no se envía ningún paquete
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.connect(('8.8.8.8', 80))
+            return s.getsockname()[0]
+        finally:
+            s.close()
+    except OSError:
+        return '127.0.0.1'
+
+
+# Paquete pip -> nombre del módulo importable
+REQUIRED_MODULES = {
+    'fastapi': 'fastapi',
+    'uvicorn': 'uvicorn',
+    'opencv-python': 'cv2',
+    'websockets': 'websockets',
+    'pydantic': 'pydantic',
+    'httptools': 'httptools',
+}
+if sys.platform != 'win32':
+    REQUIRED_MODULES['uvloop'] = 'uvloop'  # uvloop no existe en Windows
+
+
 def check_dependencies():
     """Verifica que las dependencias estén instaladas"""
     print("🔍 Verificando dependencias...")
     
-    required = ['fastapi', 'uvicorn', 'opencv-python', 'websockets', 'pydantic']
-    missing = []
-    
-    for package in required:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing.append(package)
+    # find_spec solo localiza el módulo, sin ejecutarlo (import cv2 tarda cientos de ms)
+    missing = [
+        package for package, module in REQUIRED_MODULES.items()
+        if importlib.util.find_spec(module) is None
+    ]
     
     if missing:
         print(f"❌ Faltan dependencias: {', '.join(missing)}")
@@ -39,10 +65,18 @@ def check_dependencies():
     return True
 
 
-def start_server(host='0.0.0.0', port=8000):
+def start_server(host='0.0.0.0', port=8000, reload=None):
     """Inicia el servidor FastAPI"""
     server_dir = Path(__file__).parent.parent / 'server'
     
+    # --reload solo en desarrollo (MESARPG_RELOAD=1 o `python run_server.py --reload`)
+    if reload is None:
+        reload = os.environ.get('MESARPG_RELOAD') == '1' or '--reload' in sys.argv
+    
+    # El estado del juego vive en memoria del proceso: con varios workers cada
+    # uno tendría su propia partida. Solo subir si el estado se externaliza.
+    workers = int(os.environ.get('MESARPG_WORKERS', '1'))
+    
     print(f"\n🚀 Iniciando servidor en http://{host}:{port}")
     print("   Presiona Ctrl+C para detener")
     print()
@@ -50,14 +84,23 @@ def start_server(host='0.0.0.0', port=8000):
     # Cambiar al directorio del servidor
     os.chdir(server_dir)
     
-    # Iniciar uvicorn
-    subprocess.run([
+    # Iniciar uvicorn con uvloop + httptools y sin access log
+    args = [
         sys.executable, '-m', 'uvicorn',
         'main:app',
         '--host', host,
         '--port', str(port),
-        '--reload'
-    ])
+        '--loop', 'asyncio' if sys.platform == 'win32' else 'uvloop',
+        '--http', 'httptools',
+        '--ws', 'websockets',
+        '--no-access-log',
+    ]
+    if reload:
+        args.append('--reload')
+    else:
+        args += ['--workers', str(workers)]
+    
+    subprocess.run(args)
 
 
 def main():
@@ -69,9 +112,7 @@ def main():
     print()
     
     # Obtener la IP local
-    import socket
-    hostname = socket.gethostname()
-    local_ip = socket.gethostbyname(hostname)
+    local_ip = get_local_ip()
     
     print(f"📍 IP Local: {local_ip}")
     print()
@@ -4,14 +4,22 @@ Gestiona la cámara cenital para tracking de miniaturas
 """
 
 import asyncio
-import base64
 import json
+import logging
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple, Callable, Any
 from dataclasses import dataclass, field
 from enum import Enum
 import threading
+from collections import Counter
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# pybase64 es opcional - base64 con SIMD (misma API que el módulo estándar)
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 # OpenCV es opcional - solo necesario si se usa cámara local
 try:
@@ -24,6 +32,17 @@ except ImportError:
     np = None
     print("⚠️ OpenCV no disponible - funcionalidad de cámara deshabilitada")
 
+# TurboJPEG es opcional - codificación JPEG con libjpeg-turbo (SIMD)
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+    TurboJPEG = None
+    TJPF_BGR = None
+
+logger = logging.getLogger(__name__)
+
 
 class CameraState(str, Enum):
     """Estados de la cámara"""
@@ -60,40 +79,31 @@ class TrackedMiniature:
     pixel_x: float = 0.0
     pixel_y: float = 0.0
     
-    # Historial de posiciones para suavizado
-    position_history: List[Tuple[float, float]] = field(default_factory=list)
-    
-    # Timestamps
-    last_seen: datetime = field(default_factory=datetime.now)
+    # Timestamps (last_seen en reloj monotónico; first_seen en reloj de pared)
+    last_seen_mono: float = field(default_factory=time.monotonic)
     first_seen: datetime = field(default_factory=datetime.now)
     
     # Estado
     is_visible: bool = True
     confidence: float = 1.0
     
-    def update_position(self, x: float, y: float, rotation: float, 
-                       pixel_x: float, pixel_y: float, smoothing: int = 5):
-        """Actualiza la posición con suavizado"""
-        self.position_history.append((x, y))
-        if len(self.position_history) > smoothing:
-            self.position_history = self.position_history[-smoothing:]
-        
-        # Calcular posición suavizada
-        if len(self.position_history) >= 2:
-            avg_x = sum(p[0] for p in self.position_history) / len(self.position_history)
-            avg_y = sum(p[1] for p in self.position_history) / len(self.position_history)
-            self.x = avg_x
-            self.y = avg_y
-        else:
-            self.x = x
-            self.y = y
-        
+    def set_smoothed_position(self, x: float, y: float, rotation: float,
+                              pixel_x: float, pixel_y: float, now: float):
+        """Asigna una posición ya suavizada (calculada en bloque por CameraManager)"""
+        self.x = x
+        self.y = y
         self.rotation = rotation
         self.pixel_x = pixel_x
         self.pixel_y = pixel_y
-        self.last_seen = datetime.now()
+        self.last_seen_mono = now
         self.is_visible = True
     
+    @property
+    def last_seen(self) -> datetime:
+        """Hora de pared de la última detección (calculada solo al serializar)"""
+        elapsed = time.monotonic() - self.last_seen_mono
+        return datetime.fromtimestamp(time.time() - elapsed)
+    
     def to_dict(self) -> dict:
         """Convierte a diccionario para JSON"""
         return {
@@ -126,6 +136,8 @@ class CalibrationData:
     game_height: float = 1080.0
     # Calibrado?
     is_calibrated: bool = False
+    # Homografía en float32 cacheada (evita re-cast en cada frame)
+    _H_f32: Any = field(default=None, repr=False)
     
     def calculate_homography(self) -> bool:
         """Calcula la matriz de homografía a partir de los puntos"""
@@ -139,9 +151,11 @@ class CalibrationData:
             dst = np.array(self.game_points, dtype=np.float32)
             self.homography_matrix, _ = cv2.findHomography(src, dst)
             self.is_calibrated = self.homography_matrix is not None
+            self._H_f32 = (self.homography_matrix.astype(np.float32)
+                           if self.is_calibrated else None)
             return self.is_calibrated
         except Exception as e:
-            print(f"Error calculando homografía: {e}")
+            logger.error(f"Error calculando homografía: {e}")
             return False
     
     def transform_point(self, px: float, py: float) -> Tuple[float, float]:
@@ -155,6 +169,30 @@ class CalibrationData:
         else:
             # Transformación lineal simple si no hay calibración
             return px, py
+    
+    def transform_points(self, pts: Any) -> Any:
+        """Transforma un array (N, 2) de puntos de imagen con una sola llamada"""
+        if not CV2_AVAILABLE or self._H_f32 is None or len(pts) == 0:
+            return pts
+        src = np.ascontiguousarray(pts, dtype=np.float32).reshape(1, -1, 2)
+        return cv2.perspectiveTransform(src, self._H_f32).reshape(-1, 2)
+
+
+# Parámetros del detector ArUco aplicados por defecto (ajustables con
+# CameraManager.set_detector_params). Ventanas de umbral adaptativo 5..15 paso 5:
+# siguen siendo 3 pasadas, igual que las de OpenCV (3, 13, 23), pero más pequeñas
+# (ArUco las redondea a impar: 5, 11, 15), lo que favorece los bordes finos de
+# marcadores pequeños a costa de algo de robustez con iluminación desigual sobre
+# marcadores grandes. El ahorro de tiempo viene del perímetro mínimo del 5% (3%
+# por defecto), que descarta los contornos de ruido que dominan la detección con
+# poca luz. Contrapartida: marcadores muy pequeños en la imagen (<5% del lado
+# mayor) dejan de detectarse.
+DEFAULT_DETECTOR_PARAMS = {
+    "minMarkerPerimeterRate": 0.05,
+    "adaptiveThreshWinSizeMin": 5,
+    "adaptiveThreshWinSizeMax": 15,
+    "adaptiveThreshWinSizeStep": 5,
+}
 
 
 class CameraManager:
@@ -163,7 +201,12 @@ class CameraManager:
     Maneja la conexión, detección y tracking de miniaturas.
     """
     
-    def __init__(self):
+    def __init__(self,
+                 use_aruco3: bool = True,
+                 min_side_length_canonical: int = 32,
+                 min_marker_length_ratio: float = 0.05,
+                 camera_motion_speed: float = 0.1,
+                 use_opencl: bool = False):
         # Estado
         self.state: CameraState = CameraState.DISCONNECTED
         self.error_message: Optional[str] = None
@@ -184,12 +227,30 @@ class CameraManager:
         if CV2_AVAILABLE:
             self.aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
             self.aruco_params = cv2.aruco.DetectorParameters()
-            self.aruco_detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.aruco_params)
+            # ArUco3: búsqueda de candidatos sobre imagen reducida (mucho más rápido)
+            # tau_c = minSideLengthCanonicalImg, tau_i = minMarkerLengthRatioOriginalImg
+            self.aruco_params.useAruco3Detection = use_aruco3
+            self.aruco_params.minSideLengthCanonicalImg = min_side_length_canonical
+            self.aruco_params.minMarkerLengthRatioOriginalImg = min_marker_length_ratio
+            self.aruco_params.cameraMotionSpeed = camera_motion_speed
+            # Refinado subpíxel: precisión sin el coste del refinado por contorno
+            self.aruco_params.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_SUBPIX
+            # DICT_4X4_50 tiene pocos códigos y mucha distancia entre ellos: sin
+            # corrección de errores el decodificado es más barato y, a cambio,
+            # un marcador con bits dañados se descarta en vez de corregirse
+            self.aruco_params.errorCorrectionRate = 0.0
+            self.aruco_detector = None
+            self.set_detector_params(**DEFAULT_DETECTOR_PARAMS)
         else:
             self.aruco_dict = None
             self.aruco_params = None
             self.aruco_detector = None
         
+        # OpenCL (T-API): cvtColor/resize en GPU vía cv2.UMat. Opt-in porque
+        # detectMarkers descarga la imagen a CPU y la subida puede no compensar.
+        self.use_opencl = use_opencl
+        self._opencl_active: bool = False
+        
         # Calibración
         self.calibration = CalibrationData()
         
@@ -197,12 +258,58 @@ class CameraManager:
         self.tracked_miniatures: Dict[int, TrackedMiniature] = {}
         self.miniature_timeout: float = 5.0  # Segundos sin ver antes de marcar como no visible
         
+        # Estado de tracking en arrays float32 indexados por marker_id: columnas
+        # [x, y, rotation, pixel_x, pixel_y] + ring buffer de posiciones para la
+        # media móvil. El suavizado de todos los marcadores se hace en bloque.
+        self.smoothing: int = 5
+        if CV2_AVAILABLE:
+            max_markers = self.aruco_dict.bytesList.shape[0]
+            self._track_state = np.zeros((max_markers, 5), dtype=np.float32)
+            self._history = np.zeros((max_markers, self.smoothing, 2), dtype=np.float32)
+            self._hist_idx = np.zeros(max_markers, dtype=np.intp)
+            self._hist_len = np.zeros(max_markers, dtype=np.intp)
+        else:
+            self._track_state = None
+            self._history = None
+            self._hist_idx = None
+            self._hist_len = None
+        
+        # Tracking temporal: detectar solo en ROIs alrededor de las últimas posiciones
+        self._track_rois: Dict[int, Tuple[int, int, int, int]] = {}  # marker_id -> (x0, y0, x1, y1)
+        self.roi_padding: float = 0.125       # Margen relativo al tamaño del marcador
+        self.full_detect_interval: int = 10   # Detección completa cada K frames
+        self._frames_since_full_detect: int = 0
+        self._last_seen_count: int = 0
+        
+        # Saltar la detección en frames visualmente idénticos
+        self.static_skip_after: int = 2              # Frames idénticos antes de saltar
+        self.static_redetect_interval: float = 1.0   # Detección forzada cada N segundos
+        self._last_hash: Optional[bytes] = None
+        self._unchanged_frames: int = 0
+        self._last_markers: List[dict] = []
+        self._last_detect_t: float = 0.0
+        
         # Streaming
         self.is_streaming: bool = False
         self.stream_quality: int = 80  # JPEG quality
         self.stream_fps: int = 15
+        self.keep_last_frame: bool = False  # Guardar el frame decodificado (opt-in)
         self.last_frame: Optional[np.ndarray] = None
-        self.last_frame_encoded: Optional[str] = None
+        # Último JPEG publicado como tupla inmutable (bytes, timestamp).
+        # Un único escritor (thread de captura): la asignación del atributo es
+        # atómica bajo el GIL, así que los lectores no necesitan lock.
+        self._latest_frame: Optional[Tuple[bytes, float]] = None
+        self._b64_cache: Optional[Tuple[bytes, str]] = None  # (bytes, base64) perezoso
+        
+        # Codificador JPEG (TurboJPEG si está disponible, si no cv2.imencode)
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+            except Exception as e:
+                logger.warning(f"⚠️ TurboJPEG no disponible ({e}) - usando cv2.imencode")
+        self._gray_buf = None  # Buffer reutilizable para la conversión a gris
+        self._frame_shape: Tuple[int, int] = (self.frame_height, self.frame_width)
         
         # IP Camera streaming
         self._ip_stream_active: bool = False
@@ -210,7 +317,19 @@ class CameraManager:
         # Threading
         self._capture_thread: Optional[threading.Thread] = None
         self._running: bool = False
-        self._lock = threading.Lock()
+        self._lock = threading.Lock()  # Solo para connect()/disconnect()
+        
+        # Grabber para cámaras IP/RTSP (ignoran CAP_PROP_BUFFERSIZE):
+        # vacía el buffer continuamente y guarda solo el último frame
+        self._grab_thread: Optional[threading.Thread] = None
+        self._grab_lock = threading.Lock()
+        self._latest_raw_frame = None
+        self._grab_caps: Counter = Counter()  # Capturas en uso por grabbers vivos (bajo _lock)
+        
+        # Notificación de marcadores (throttle a stream_fps + solo cambios)
+        self.broadcast_epsilon: float = 0.5  # Cambio mínimo en x, y o rotación
+        self._last_broadcast_t: float = 0.0
+        self._last_broadcast_state: Dict[int, Tuple[float, float, float]] = {}
         
         # Callbacks
         self._on_markers_detected: Optional[Callable[[List[dict]], None]] = None
@@ -219,10 +338,24 @@ class CameraManager:
         # Estadísticas
         self.stats = {
             "frames_processed": 0,
+            "frames_skipped": 0,
             "markers_detected_total": 0,
-            "last_detection_time": None,
             "avg_detection_time_ms": 0.0
         }
+        self._last_detection_ts: Optional[float] = None  # time.time(), ISO solo en get_status
+    
+    def set_detector_params(self, **params):
+        """
+        Ajusta parámetros de cv2.aruco.DetectorParameters por nombre
+        (p.ej. minMarkerPerimeterRate=0.05) y reconstruye el detector.
+        """
+        if not CV2_AVAILABLE:
+            return
+        for name, value in params.items():
+            if not hasattr(self.aruco_params, name):
+                raise ValueError(f"Parámetro ArUco desconocido: {name}")
+            setattr(self.aruco_params, name, value)
+        self.aruco_detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.aruco_params)
     
     def set_callbacks(self, 
                       on_markers_detected: Callable[[List[dict]], None] = None,
@@ -255,12 +388,13 @@ class CameraManager:
             self.camera_id = camera_id
             self.camera_url = camera_url
             
-            if camera_url:
-                print(f"📱 Conectando a cámara IP: {camera_url}")
-                self.cap = cv2.VideoCapture(camera_url)
-            else:
-                print(f"📷 Abriendo cámara USB ID: {camera_id}")
-                self.cap = cv2.VideoCapture(camera_id)
+            with self._lock:
+                if camera_url:
+                    logger.info(f"📱 Conectando a cámara IP: {camera_url}")
+                    self.cap = cv2.VideoCapture(camera_url)
+                else:
+                    logger.info(f"📷 Abriendo cámara USB ID: {camera_id}")
+                    self.cap = cv2.VideoCapture(camera_id)
             
             if not self.cap.isOpened():
                 source = camera_url or f"cámara {camera_id}"
@@ -271,13 +405,25 @@ class CameraManager:
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
             self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+            # Buffer mínimo: procesar siempre el frame más reciente
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            
+            # Activar OpenCL si se pidió y hay dispositivo disponible
+            self._opencl_active = self.use_opencl and cv2.ocl.haveOpenCL()
+            if self._opencl_active:
+                cv2.ocl.setUseOpenCL(True)
+                logger.info("⚡ OpenCL activado para el preprocesado de frames")
             
             # Obtener resolución real
             self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             actual_fps = int(self.cap.get(cv2.CAP_PROP_FPS))
             
-            print(f"📷 Cámara conectada: {self.frame_width}x{self.frame_height} @ {actual_fps}fps")
+            # Preasignar el buffer de grises con la resolución real
+            self._gray_buf = np.empty((self.frame_height, self.frame_width), np.uint8)
+            self._frame_shape = (self.frame_height, self.frame_width)
+            
+            logger.info(f"📷 Cámara conectada: {self.frame_width}x{self.frame_height} @ {actual_fps}fps")
             self._set_state(CameraState.CONNECTED)
             return True
             
@@ -289,44 +435,54 @@ class CameraManager:
         """Desconecta la cámara"""
         self.stop_streaming()
         
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        with self._lock:
+            if self.cap:
+                # Si el grabber sigue bloqueado en grab() tras el join, liberar
+                # aquí cerraría la captura bajo sus pies: la libera él al salir
+                if self.cap not in self._grab_caps:
+                    self.cap.release()
+                self.cap = None
+            self._latest_frame = None
         
         self._set_state(CameraState.DISCONNECTED)
-        print("📷 Cámara desconectada")
+        logger.info("📷 Cámara desconectada")
     
     def get_available_cameras(self) -> List[dict]:
         """Lista las cámaras disponibles"""
         if not CV2_AVAILABLE:
             return []
             
-        cameras = []
-        
-        for i in range(10):  # Probar hasta 10 índices
+        def probe(i: int) -> Optional[dict]:
             cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                cameras.append({
+            try:
+                if not cap.isOpened():
+                    return None
+                return {
                     "id": i,
                     "name": f"Cámara {i}",
                     "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
                     "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                })
+                }
+            finally:
                 cap.release()
         
-        return cameras
+        # Probar hasta 10 índices en paralelo (OpenCV libera el GIL al abrir)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = pool.map(probe, range(10))
+        
+        return [cam for cam in results if cam is not None]
     
     # === Streaming ===
     
     def start_streaming(self):
         """Inicia el streaming de video con detección"""
         if not CV2_AVAILABLE:
-            print("⚠️ OpenCV no disponible")
+            logger.warning("⚠️ OpenCV no disponible")
             return False
             
         if self.state != CameraState.CONNECTED:
             if not self.cap or not self.cap.isOpened():
-                print("⚠️ Cámara no conectada")
+                logger.warning("⚠️ Cámara no conectada")
                 return False
         
         if self._running:
@@ -334,11 +490,17 @@ class CameraManager:
         
         self._running = True
         self.is_streaming = True
+        self._latest_raw_frame = None
+        if self.camera_url:
+            with self._lock:
+                self._grab_caps[self.cap] += 1
+            self._grab_thread = threading.Thread(target=self._grab_loop, args=(self.cap,), daemon=True)
+            self._grab_thread.start()
         self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
         self._capture_thread.start()
         
         self._set_state(CameraState.STREAMING)
-        print("🎥 Streaming iniciado")
+        logger.info("🎥 Streaming iniciado")
         return True
     
     def stop_streaming(self):
@@ -350,9 +512,46 @@ class CameraManager:
             self._capture_thread.join(timeout=2.0)
             self._capture_thread = None
         
+        if self._grab_thread:
+            self._grab_thread.join(timeout=2.0)
+            self._grab_thread = None
+        
         if self.state == CameraState.STREAMING:
             self._set_state(CameraState.CONNECTED)
-        print("🎥 Streaming detenido")
+        logger.info("🎥 Streaming detenido")
+    
+    def _grab_loop(self, cap):
+        """Vacía el buffer de la cámara IP tan rápido como llega, guardando solo el último frame"""
+        try:
+            while self._running and cap.isOpened():
+                if not cap.grab():
+                    time.sleep(0.005)
+                    continue
+                ret, frame = cap.retrieve()
+                if ret:
+                    with self._grab_lock:
+                        self._latest_raw_frame = frame
+        finally:
+            with self._lock:
+                self._grab_caps[cap] -= 1
+                if not self._grab_caps[cap]:
+                    del self._grab_caps[cap]
+                if self.cap is not cap:
+                    # disconnect() soltó la captura sin liberarla mientras grab() seguía bloqueado
+                    cap.release()
+    
+    def _read_latest_frame(self) -> Optional[Any]:
+        """Obtiene el frame más reciente (descartando los antiguos)"""
+        if self._grab_thread is None:
+            ret, frame = self.cap.read()
+            return frame if ret else None
+        
+        with self._grab_lock:
+            frame = self._latest_raw_frame
+            self._latest_raw_frame = None
+        if frame is None:
+            time.sleep(0.002)  # Aún no hay frame nuevo
+        return frame
     
     def _capture_loop(self):
         """Loop de captura en thread separado"""
@@ -362,49 +561,84 @@ class CameraManager:
         while self._running and self.cap and self.cap.isOpened():
             current_time = time.time()
             
-            ret, frame = self.cap.read()
-            if not ret:
+            frame = self._read_latest_frame()
+            if frame is None:
                 continue
             
-            # Detectar marcadores
-            start_time = time.time()
-            markers, annotated_frame = self._detect_markers(frame)
-            detection_time = (time.time() - start_time) * 1000
-            
-            # Actualizar estadísticas
+            gray = self._to_gray(frame)
             self.stats["frames_processed"] += 1
-            self.stats["markers_detected_total"] += len(markers)
-            self.stats["last_detection_time"] = datetime.now().isoformat()
-            self.stats["avg_detection_time_ms"] = (
-                self.stats["avg_detection_time_ms"] * 0.9 + detection_time * 0.1
-            )
+            
+            if self._is_static_frame(gray, current_time):
+                # Tablero sin cambios: reutilizar la última detección
+                markers = self._last_markers
+                self.stats["frames_skipped"] += 1
+            else:
+                # Detectar marcadores (sin copiar el frame)
+                start_time = time.time()
+                markers = self._detect_markers_fast(gray)
+                detection_time = (time.time() - start_time) * 1000
+                self._last_markers = markers
+                self._last_detect_t = current_time
+                
+                # Actualizar estadísticas
+                self.stats["markers_detected_total"] += len(markers)
+                self._last_detection_ts = current_time
+                self.stats["avg_detection_time_ms"] = (
+                    self.stats["avg_detection_time_ms"] * 0.9 + detection_time * 0.1
+                )
             
             # Actualizar tracking
             self._update_tracking(markers)
             
-            # Notificar detecciones
-            if markers and self._on_markers_detected:
-                try:
-                    self._on_markers_detected(markers)
-                except Exception as e:
-                    print(f"Error en callback de marcadores: {e}")
+            # Notificar detecciones: como mucho a stream_fps y solo si algo cambió
+            if (self._on_markers_detected and
+                    current_time - self._last_broadcast_t >= frame_interval):
+                self._last_broadcast_t = current_time
+                changed = self._changed_markers(markers)
+                if changed:
+                    try:
+                        self._on_markers_detected(changed)
+                    except Exception as e:
+                        logger.error(f"Error en callback de marcadores: {e}")
             
             # Codificar frame para streaming (con rate limit)
             if current_time - last_frame_time >= frame_interval:
-                with self._lock:
-                    self.last_frame = annotated_frame.copy()
-                    _, buffer = cv2.imencode('.jpg', annotated_frame, 
-                                            [cv2.IMWRITE_JPEG_QUALITY, self.stream_quality])
-                    self.last_frame_encoded = base64.b64encode(buffer).decode('utf-8')
+                # Anotar in-place solo cuando se va a emitir un JPEG
+                annotated_frame = self._annotate(frame, markers)
+                if self.keep_last_frame:
+                    # El frame es nuevo en cada lectura: no hace falta copiarlo
+                    self.last_frame = annotated_frame
+                # El JPEG se publica como bytes nuevos en cada frame (no se
+                # reutiliza buffer): los lectores lo usan sin lock
+                self._latest_frame = (self._encode_jpeg(annotated_frame), current_time)
                 last_frame_time = current_time
             
             # Pequeña pausa para no saturar CPU
             time.sleep(0.001)
     
+    def _encode_jpeg(self, frame: Any) -> bytes:
+        """Codifica un frame BGR a JPEG (bytes crudos)"""
+        if self._tj is not None:
+            return self._tj.encode(frame, quality=self.stream_quality, pixel_format=TJPF_BGR)
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.stream_quality])
+        return buffer.tobytes()
+    
+    def get_current_frame_bytes(self) -> Optional[bytes]:
+        """Obtiene el frame actual como JPEG en bytes (para transporte binario)"""
+        latest = self._latest_frame
+        return latest[0] if latest else None
+    
     def get_current_frame(self) -> Optional[str]:
-        """Obtiene el frame actual codificado en base64"""
-        with self._lock:
-            return self.last_frame_encoded
+        """Obtiene el frame actual codificado en base64 (compatibilidad)"""
+        frame_bytes = self.get_current_frame_bytes()
+        if frame_bytes is None:
+            return None
+        # Codificar a base64 solo cuando alguien lo pide, una vez por frame
+        cache = self._b64_cache
+        if cache is None or cache[0] is not frame_bytes:
+            cache = (frame_bytes, base64.b64encode(frame_bytes).decode('utf-8'))
+            self._b64_cache = cache
+        return cache[1]
     
     def capture_single_frame(self) -> Optional[str]:
         """Captura un único frame"""
@@ -415,49 +649,157 @@ class CameraManager:
         if not ret:
             return None
         
-        _, annotated = self._detect_markers(frame)
-        _, buffer = cv2.imencode('.jpg', annotated, 
-                                [cv2.IMWRITE_JPEG_QUALITY, self.stream_quality])
-        return base64.b64encode(buffer).decode('utf-8')
+        markers = self._detect_markers_fast(self._to_gray(frame))
+        annotated = self._annotate(frame, markers)
+        return base64.b64encode(self._encode_jpeg(annotated)).decode('utf-8')
     
     # === Detección ===
     
-    def _detect_markers(self, frame: Any) -> Tuple[List[dict], Any]:
-        """Detecta marcadores ArUco en el frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        corners, ids, rejected = self.aruco_detector.detectMarkers(gray)
+    def _changed_markers(self, markers: List[dict]) -> List[dict]:
+        """Marcadores nuevos o cuya (x, y, rotación) cambió más que broadcast_epsilon"""
+        eps = self.broadcast_epsilon
+        previous = self._last_broadcast_state
+        state = {}
+        changed = []
+        
+        for m in markers:
+            current = (m["x"], m["y"], m["rotation"])
+            old = previous.get(m["id"])
+            if (old is None or abs(current[0] - old[0]) > eps or
+                    abs(current[1] - old[1]) > eps or abs(current[2] - old[2]) > eps):
+                changed.append({**m, "corners": m["corners"].tolist()})
+                old = current
+            state[m["id"]] = old
+        
+        self._last_broadcast_state = state
+        return changed
+    
+    def _is_static_frame(self, gray: Any, now: float) -> bool:
+        """
+        Compara una huella de 64 bits (8x8, umbral por la media) con la del
+        frame anterior. El frame se considera estático tras varios frames
+        idénticos, pero se fuerza una detección completa periódicamente.
+        """
+        small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+        if isinstance(small, cv2.UMat):
+            small = small.get()
+        fingerprint = (small > small.mean()).tobytes()
+        
+        if fingerprint == self._last_hash:
+            self._unchanged_frames += 1
+        else:
+            self._last_hash = fingerprint
+            self._unchanged_frames = 0
+        
+        return (self._unchanged_frames >= self.static_skip_after and
+                now - self._last_detect_t < self.static_redetect_interval)
+    
+    def _to_gray(self, frame: Any) -> Any:
+        """Convierte a escala de grises reutilizando un buffer preasignado"""
+        self._frame_shape = frame.shape[:2]
+        if frame.ndim == 2:
+            return frame
+        if self._opencl_active:
+            # La conversión se ejecuta en el dispositivo OpenCL
+            return cv2.cvtColor(cv2.UMat(frame), cv2.COLOR_BGR2GRAY)
+        h, w = frame.shape[:2]
+        if self._gray_buf is None or self._gray_buf.shape != (h, w):
+            self._gray_buf = np.empty((h, w), np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+        return self._gray_buf
+    
+    def _detect_in_rois(self, gray: Any) -> Tuple[List[Any], Any]:
+        """Detecta marcadores solo en las ROIs de los marcadores trackeados"""
+        h, w = self._frame_shape
+        is_umat = isinstance(gray, cv2.UMat)
+        all_corners = []
+        all_ids = []
+        
+        for x0, y0, x1, y1 in self._track_rois.values():
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(w, x1), min(h, y1)
+            if x1 - x0 < 8 or y1 - y0 < 8:
+                continue
+            
+            patch = cv2.UMat(gray, (y0, y1), (x0, x1)) if is_umat else gray[y0:y1, x0:x1]
+            corners, ids, _ = self.aruco_detector.detectMarkers(patch)
+            if ids is None:
+                continue
+            
+            # Llevar las esquinas a coordenadas del frame completo
+            offset = np.array([x0, y0], dtype=np.float32)
+            for corner, marker_id in zip(corners, ids.ravel().tolist()):
+                if marker_id in all_ids:
+                    continue  # ROIs solapadas
+                all_corners.append(corner + offset)
+                all_ids.append(marker_id)
+        
+        if not all_ids:
+            return [], None
+        return all_corners, np.array(all_ids, dtype=np.int32).reshape(-1, 1)
+    
+    def _detect_markers_fast(self, gray: Any) -> List[dict]:
+        """Detecta marcadores ArUco en un frame en escala de grises (sin anotar)"""
+        corners, ids = [], None
+        use_rois = (self._track_rois and
+                    self._frames_since_full_detect < self.full_detect_interval)
+        
+        if use_rois:
+            corners, ids = self._detect_in_rois(gray)
+            seen = 0 if ids is None else len(ids)
+            # Si se ha perdido algún marcador, buscar en todo el frame
+            use_rois = seen >= self._last_seen_count
+        
+        if use_rois:
+            self._frames_since_full_detect += 1
+        else:
+            corners, ids, rejected = self.aruco_detector.detectMarkers(gray)
+            self._frames_since_full_detect = 0
         
         markers = []
-        annotated = frame.copy()
         
         if ids is not None and len(ids) > 0:
-            cv2.aruco.drawDetectedMarkers(annotated, corners, ids)
+            # Todas las esquinas en un único array (N, 4, 2) float32
+            c = np.concatenate(corners, axis=0)
             
-            for i, marker_id in enumerate(ids.flatten()):
-                corner = corners[i][0]
-                
-                # Centro en píxeles
-                center_x = float(np.mean(corner[:, 0]))
-                center_y = float(np.mean(corner[:, 1]))
-                
-                # Rotación
-                dx = corner[1][0] - corner[0][0]
-                dy = corner[1][1] - corner[0][1]
-                rotation = float(np.degrees(np.arctan2(dy, dx)))
-                
-                # Convertir a coordenadas de juego
-                game_x, game_y = self.calibration.transform_point(center_x, center_y)
-                
-                marker_data = {
-                    "id": int(marker_id),
+            # Centros en píxeles
+            centers = c.mean(axis=1)
+            
+            # Rotaciones (vector de la esquina 0 a la 1)
+            d = c[:, 1] - c[:, 0]
+            rotations = np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+            
+            # Convertir a coordenadas de juego (todos los centros a la vez)
+            game_points = self.calibration.transform_points(centers)
+            
+            # Las esquinas quedan como vistas (4, 2) de c; se pasan a lista
+            # solo al notificar (ver _changed_markers)
+            for marker_id, (center_x, center_y), (game_x, game_y), rotation, corner in zip(
+                    ids.ravel().tolist(), centers.tolist(), game_points.tolist(),
+                    rotations.tolist(), c):
+                markers.append({
+                    "id": marker_id,
                     "x": game_x,
                     "y": game_y,
                     "rotation": rotation,
                     "pixel_x": center_x,
                     "pixel_y": center_y,
-                    "corners": corner.tolist()
-                }
-                markers.append(marker_data)
+                    "corners": corner
+                })
+        
+        self._last_seen_count = len(markers)
+        return markers
+    
+    def _annotate(self, frame: Any, markers: List[dict]) -> Any:
+        """Dibuja marcadores y overlay directamente sobre el frame (in-place)"""
+        if markers:
+            corners = [m["corners"][np.newaxis] for m in markers]
+            ids = np.array([[m["id"]] for m in markers], dtype=np.int32)
+            cv2.aruco.drawDetectedMarkers(frame, corners, ids)
+            
+            for m in markers:
+                marker_id = m["id"]
+                center_x, center_y = m["pixel_x"], m["pixel_y"]
                 
                 # Anotar en frame
                 miniature = self.tracked_miniatures.get(marker_id)
@@ -465,15 +807,15 @@ class CameraManager:
                 if miniature and miniature.player_name:
                     label = f"{miniature.player_name}"
                 
-                cv2.putText(annotated, label,
+                cv2.putText(frame, label,
                            (int(center_x) - 30, int(center_y) - 20),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                cv2.circle(annotated, (int(center_x), int(center_y)), 5, (0, 0, 255), -1)
+                cv2.circle(frame, (int(center_x), int(center_y)), 5, (0, 0, 255), -1)
         
         # Dibujar info de tracking
-        self._draw_tracking_overlay(annotated)
+        self._draw_tracking_overlay(frame)
         
-        return markers, annotated
+        return frame
     
     def _draw_tracking_overlay(self, frame: Any):
         """Dibuja información de overlay en el frame"""
@@ -501,33 +843,57 @@ class CameraManager:
     def _update_tracking(self, markers: List[dict]):
         """Actualiza el tracking de miniaturas"""
         seen_ids = set()
+        now = time.monotonic()  # Un único timestamp por frame
+        
+        # ROIs para el siguiente frame: bbox de las esquinas + margen
+        self._track_rois = {}
+        if markers:
+            c = np.stack([m["corners"] for m in markers])
+            mins, maxs = c.min(axis=1), c.max(axis=1)
+            pads = (maxs - mins).max(axis=1, keepdims=True) * self.roi_padding
+            lo = (mins - pads).astype(np.int32)
+            hi = (maxs + pads).astype(np.int32) + 1
+            for marker, (x0, y0), (x1, y1) in zip(markers, lo.tolist(), hi.tolist()):
+                self._track_rois[marker["id"]] = (x0, y0, x1, y1)
         
-        for marker in markers:
-            marker_id = marker["id"]
-            seen_ids.add(marker_id)
+        if markers:
+            ids = np.fromiter((m["id"] for m in markers), dtype=np.intp, count=len(markers))
+            values = np.array(
+                [(m["x"], m["y"], m["rotation"], m["pixel_x"], m["pixel_y"]) for m in markers],
+                dtype=np.float32
+            )
             
-            if marker_id not in self.tracked_miniatures:
-                # Nueva miniatura detectada
-                self.tracked_miniatures[marker_id] = TrackedMiniature(
-                    marker_id=marker_id,
-                    first_seen=datetime.now()
-                )
+            for marker_id in ids.tolist():
+                seen_ids.add(marker_id)
+                if marker_id not in self.tracked_miniatures:
+                    # Nueva miniatura detectada: historial vacío
+                    self.tracked_miniatures[marker_id] = TrackedMiniature(marker_id=marker_id)
+                    self._history[marker_id] = 0.0
+                    self._hist_idx[marker_id] = 0
+                    self._hist_len[marker_id] = 0
+            
+            # Media móvil de todas las miniaturas a la vez. Los huecos del ring
+            # buffer valen 0, así que la suma entre n es la media de lo visto.
+            slot = self._hist_idx[ids]
+            self._history[ids, slot] = values[:, :2]
+            self._hist_idx[ids] = (slot + 1) % self.smoothing
+            n = np.minimum(self._hist_len[ids] + 1, self.smoothing)
+            self._hist_len[ids] = n
+            
+            state = self._track_state
+            state[ids, :2] = self._history[ids].sum(axis=1) / n[:, None]
+            state[ids, 2:] = values[:, 2:]
             
             # Actualizar posición
-            self.tracked_miniatures[marker_id].update_position(
-                x=marker["x"],
-                y=marker["y"],
-                rotation=marker["rotation"],
-                pixel_x=marker["pixel_x"],
-                pixel_y=marker["pixel_y"]
-            )
+            for marker_id, (x, y, rotation, pixel_x, pixel_y) in zip(ids.tolist(), state[ids].tolist()):
+                self.tracked_miniatures[marker_id].set_smoothed_position(
+                    x, y, rotation, pixel_x, pixel_y, now
+                )
         
         # Marcar las no visibles
-        now = datetime.now()
         for marker_id, miniature in self.tracked_miniatures.items():
             if marker_id not in seen_ids:
-                time_since_seen = (now - miniature.last_seen).total_seconds()
-                if time_since_seen > self.miniature_timeout:
+                if now - miniature.last_seen_mono > self.miniature_timeout:
                     miniature.is_visible = False
     
     def assign_player_to_miniature(self, marker_id: int, player_id: str, 
@@ -542,7 +908,7 @@ class CameraManager:
         miniature.player_name = player_name
         miniature.character_name = character_name
         
-        print(f"✅ Miniatura {marker_id} asignada a {player_name}")
+        logger.info(f"✅ Miniatura {marker_id} asignada a {player_name}")
         return True
     
     def unassign_miniature(self, marker_id: int) -> bool:
@@ -588,10 +954,10 @@ class CameraManager:
         """Finaliza la calibración calculando la homografía"""
         if self.calibration.calculate_homography():
             self._set_state(CameraState.CONNECTED if not self._running else CameraState.STREAMING)
-            print("✅ Calibración completada")
+            logger.info("✅ Calibración completada")
             return True
         else:
-            print("❌ Error en calibración")
+            logger.error("❌ Error en calibración")
             return False
     
     def set_simple_calibration(self, game_width: float, game_height: float):
@@ -643,7 +1009,13 @@ class CameraManager:
                 "visible_miniatures": sum(1 for m in self.tracked_miniatures.values() if m.is_visible),
                 "assigned_miniatures": sum(1 for m in self.tracked_miniatures.values() if m.player_id)
             },
-            "stats": self.stats,
+            "stats": {
+                **self.stats,
+                "last_detection_time": (
+                    datetime.fromtimestamp(self._last_detection_ts).isoformat()
+                    if self._last_detection_ts else None
+                )
+            },
             "cv2_available": CV2_AVAILABLE
         }
 
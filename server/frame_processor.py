@@ -5,12 +5,25 @@ Incluye tracking SORT y detección de orientación
 Soporte para OpenVINO para inferencia acelerada
 """
 
-import base64
+import asyncio
+import functools
+import math
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from pathlib import Path
 import time
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# xxhash es opcional - hash rápido para detectar frames repetidos
+try:
+    import xxhash
+    frame_digest = xxhash.xxh3_64_intdigest
+except ImportError:
+    import zlib
+    frame_digest = zlib.crc32
 
 # Importar tracker simple
 try:
@@ -22,8 +35,16 @@ except ImportError:
 try:
     import cv2
     CV2_AVAILABLE = True
+    # imdecode con reducción en la DCT (factor -> flag)
+    IMREAD_REDUCED_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
 except ImportError:
     CV2_AVAILABLE = False
+    IMREAD_REDUCED_FLAGS = {}
     print("⚠️ OpenCV no disponible - procesamiento de frames desactivado")
 
 try:
@@ -42,22 +63,95 @@ try:
 except ImportError:
     print("ℹ️ OpenVINO no instalado - usando inferencia estándar")
 
+# TurboJPEG es opcional - libjpeg-turbo (SIMD) para decodificar/codificar,
+# con decodificación a escala reducida (1/2, 1/4, 1/8)
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+    TurboJPEG = None
+    TJPF_BGR = None
+    TJSAMP_420 = None
+
+@functools.lru_cache(maxsize=1)
+def _probe_accelerators() -> Dict[str, object]:
+    """
+    Importa PyTorch (dependencia de ultralytics) y comprueba CUDA, TensorRT
+    y ONNX Runtime con CUDAExecutionProvider. Inicializar CUDA cuesta
+    segundos, así que no se hace al importar el módulo sino la primera vez
+    que se carga un modelo, y el resultado queda cacheado.
+    """
+    try:
+        import torch
+        cuda = torch.cuda.is_available()
+    except ImportError:
+        torch = None
+        cuda = False
+    
+    # TensorRT es opcional - motor FP16 compilado para la GPU
+    tensorrt_ok = False
+    try:
+        import tensorrt
+        tensorrt_ok = cuda
+        if tensorrt_ok:
+            print(f"✅ TensorRT {tensorrt.__version__} disponible")
+    except ImportError:
+        pass
+    
+    # ONNX Runtime es opcional - inferencia con CUDAExecutionProvider sin TensorRT
+    onnx_cuda = False
+    try:
+        import onnxruntime
+        onnx_cuda = "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+    except ImportError:
+        pass
+    
+    return {"torch": torch, "cuda": cuda, "tensorrt": tensorrt_ok, "onnx_cuda": onnx_cuda}
+
+
+# Tablas cos/sin por grado entero para las flechas de orientación
+ARROW_COS_LUT = np.cos(np.radians(np.arange(360)))
+ARROW_SIN_LUT = np.sin(np.radians(np.arange(360)))
+
+# Extensiones de imagen válidas para la calibración INT8
+CALIB_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+# Colores BGR de los tracks (por id)
+TRACK_COLORS = ((0,255,0), (255,0,0), (0,0,255), (255,255,0),
+                (255,0,255), (0,255,255), (128,0,255), (255,128,0),
+                (0,128,255), (255,0,128), (128,255,0), (0,255,128))
+
 
 class FrameProcessor:
     """Procesa frames de video con YOLO + SORT tracking + orientación"""
     
     def __init__(self, model_path: str = "yolov8n.pt", confidence: float = 0.4, 
-                 use_openvino: bool = True):
+                 use_openvino: bool = True, use_tensorrt: bool = True,
+                 use_onnx: bool = True, int8: bool = True, load_model: bool = True):
         self.model = None
         self.confidence = confidence
         self.model_path = model_path
+        self.infer_size = 320  # Tamaño de inferencia (modelos exportados a 320)
+        self.preview_size = 640  # Lado mínimo del frame anotado que se devuelve
+        self.annotate_full_res = False  # Dibujar sobre el frame a resolución nativa
         self.is_ready = False
         self.is_pose_model = False
         self.is_obb_model = False
+        # Preferencias de backend: se cruzan con el hardware en load_model
+        self.use_tensorrt = use_tensorrt
+        self.use_onnx = use_onnx
         self.use_openvino = use_openvino and OPENVINO_AVAILABLE
+        self.use_int8 = int8  # INT8 solo tiene sentido en CPU
+        self.int8_min_calib_images = 32  # Imágenes mínimas para calibrar INT8
+        self._torch = None  # Módulo torch, importado en load_model
+        self._cuda = False
         self.using_openvino = False  # Se pone a True si realmente carga modelo OpenVINO
+        self.backend = "none"  # tensorrt | onnx | openvino | pytorch
+        self._unpack = None  # _unpack_pose | _unpack_obb | _unpack_boxes según el modelo
+        self._names: Dict[int, str] = {}
         self.last_detections: List[Dict] = []
-        self.last_processed_frame: Optional[str] = None
+        self.last_processed_frame: Optional[bytes] = None
         self.last_tracks: List[Dict] = []
         
         # Tracker simple para seguimiento - solo por distancia de centros
@@ -66,15 +160,98 @@ class FrameProcessor:
             max_missing=30       # 30 frames sin ver = eliminar
         )
         
+        # Códec JPEG (TurboJPEG si está disponible, si no cv2.imdecode/imencode)
+        self.jpeg_quality = 60  # Calidad reducida para velocidad
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+            except Exception as e:
+                print(f"⚠️ TurboJPEG no disponible ({e}) - usando cv2.imdecode/imencode")
+        self._last_frame_size: Optional[Tuple[int, int]] = None  # (w, h) original
+        self._text_masks: Dict[Tuple[str, float, int], Tuple[np.ndarray, int, int]] = {}
+        
+        # Saltar YOLO en escenas estáticas (miniatura 32x32 en gris)
+        self.static_threshold = 2.0   # Diferencia media (niveles de gris) para considerar cambio
+        self.static_max_skips = 30    # Inferencia forzada cada N frames estáticos
+        self._ref_thumb: Optional[np.ndarray] = None
+        self._static_skips = 0
+        self._last_raw_detections: List[Dict] = []
+        
+        # Frame JPEG idéntico al anterior (fuente pausada): devolver el
+        # resultado anterior sin decodificar, inferir ni codificar
+        self._last_digest: Optional[int] = None
+        self._last_result: Optional[Tuple[Optional[bytes], List[Dict], float]] = None
+        
+        # Lienzos de letterbox (infer_size x infer_size) por posición del lote,
+        # más buffers intermedios de resize para frames verticales
+        self._canvases: Dict[int, np.ndarray] = {}
+        self._canvas_geom: Dict[int, Tuple[int, int]] = {}  # slot -> (h, w) del contenido
+        self._small_bufs: Dict[int, np.ndarray] = {}
+        
+        # Preprocesado en GPU (solo backend PyTorch con CUDA): los frames se
+        # suben como uint8 desde memoria pinned y se normalizan en la GPU
+        self.gpu_preprocess = True
+        self._pinned = None  # torch.Tensor (B, S, S, 3) uint8: lienzos en modo GPU
+        # torch.compile del modelo PyTorch para la forma fija de entrada (solo CUDA)
+        self.compile_model = True
+        
+        # Micro-batching: frames que llegan casi a la vez comparten inferencia
+        self.max_batch = 8
+        self.batch_timeout = 0.005  # Segundos esperando más frames para el lote
+        
+        # Pipeline asíncrono decode -> inferencia -> encode (un thread por etapa)
+        self._decode_queue: Optional[asyncio.Queue] = None
+        self._infer_queue: Optional[asyncio.Queue] = None
+        self._encode_queue: Optional[asyncio.Queue] = None
+        self._pipeline_tasks: List[asyncio.Task] = []
+        self._stage_executors: Dict[str, ThreadPoolExecutor] = {
+            stage: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"frames-{stage}")
+            for stage in ("decode", "infer", "encode")
+        }
+        
         # Para estadísticas
         self._frame_count = 0
         self._process_count = 0
         self._last_fps_time = time.time()
         self._fps = 0
         
-        # Cargar modelo si está disponible
-        if YOLO_AVAILABLE:
+        # Cargar modelo si está disponible (o más tarde con load_model())
+        self._model_loaded = False
+        self._load_lock = threading.Lock()
+        if load_model:
+            self.load_model()
+    
+    def load_model(self):
+        """
+        Carga y precalienta el modelo una sola vez (seguro entre threads).
+        El precalentado corre en el thread de la etapa de inferencia, el mismo
+        que usan los frames reales (comparten predictor, lienzos y memoria
+        pinned), y is_ready solo se activa al terminar: hasta entonces el
+        pipeline no toca el modelo.
+        """
+        with self._load_lock:
+            if self._model_loaded or not YOLO_AVAILABLE:
+                return
+            self._model_loaded = True
+            self._resolve_accelerators()
             self._load_model()
+            if self.model is None:
+                return
+            if CV2_AVAILABLE:
+                self._stage_executors["infer"].submit(self._warmup).result()
+            self.is_ready = True
+    
+    def _resolve_accelerators(self):
+        """Ajusta las preferencias de backend a lo que hay realmente disponible"""
+        accel = _probe_accelerators()
+        self._torch = torch = accel["torch"]
+        self._cuda = cuda = accel["cuda"]
+        self.use_tensorrt = self.use_tensorrt and accel["tensorrt"]
+        self.use_onnx = self.use_onnx and accel["onnx_cuda"]
+        self.use_int8 = self.use_int8 and not cuda
+        self.gpu_preprocess = self.gpu_preprocess and cuda
+        self.compile_model = self.compile_model and cuda and hasattr(torch, "compile")
     
     def _get_openvino_model_path(self, pt_path: Path) -> Optional[Path]:
         """Obtiene la ruta del modelo OpenVINO pre-exportado"""
@@ -98,6 +275,101 @@ class FrameProcessor:
         print(f"ℹ️ No hay modelo OpenVINO para {pt_path.name}")
         return None
     
+    def _get_openvino_int8_path(self, pt_path: Path) -> Optional[Path]:
+        """
+        Obtiene el modelo OpenVINO INT8 (nombre_int8_openvino_model/). Si no
+        existe se exporta una vez calibrando con dataset/images/val. Si la
+        exportación falla queda un marcador (nombre.int8_failed) y no se
+        reintenta en cada arranque hasta que cambie el .pt o se borre.
+        """
+        int8_dir = pt_path.parent / f"{pt_path.stem}_int8_openvino_model"
+        if (int8_dir / f"{pt_path.stem}.xml").exists():
+            print(f"✅ Encontrado modelo OpenVINO INT8: {int8_dir}")
+            return int8_dir
+        
+        failed_marker = pt_path.with_suffix(".int8_failed")
+        if failed_marker.exists() and failed_marker.stat().st_mtime >= pt_path.stat().st_mtime:
+            print(f"ℹ️ Exportación INT8 fallida anteriormente ({failed_marker.name}) - se omite")
+            return None
+        
+        dataset_dir = pt_path.parent / "dataset"
+        val_dir = dataset_dir / "images" / "val"
+        n_images = sum(1 for f in val_dir.glob("*") if f.suffix.lower() in CALIB_IMAGE_SUFFIXES) \
+            if val_dir.is_dir() else 0
+        if n_images < self.int8_min_calib_images:
+            print(f"ℹ️ Solo {n_images} imágenes de calibración en {val_dir} "
+                  f"(mínimo {self.int8_min_calib_images}) - no se exporta INT8")
+            return None
+        
+        # data.yaml del dataset tiene rutas absolutas de otra máquina: generar
+        # uno temporal que apunte al dataset local
+        calib_yaml = None
+        try:
+            model = YOLO(str(pt_path))
+            names = "\n".join(f"  {i}: {name}" for i, name in model.names.items())
+            # Los modelos Pose necesitan kpt_shape en el yaml para validar el dataset
+            kpt_shape = getattr(model.model, "yaml", {}).get("kpt_shape")
+            kpt_line = f"kpt_shape: {list(kpt_shape)}\n" if kpt_shape else ""
+            with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+                f.write(f"path: {dataset_dir.as_posix()}\n"
+                        f"train: images/train\nval: images/val\n{kpt_line}names:\n{names}\n")
+                calib_yaml = f.name
+            
+            print(f"⏳ Exportando {pt_path.name} a OpenVINO INT8 ({self.infer_size}px)...")
+            exported = model.export(format="openvino", int8=True, data=calib_yaml,
+                                    imgsz=self.infer_size)
+            return Path(exported)
+        except Exception as e:
+            print(f"⚠️ No se pudo exportar a OpenVINO INT8: {e}")
+            try:
+                failed_marker.write_text(f"{e}\n", encoding="utf-8")
+            except OSError:
+                pass
+            return None
+        finally:
+            if calib_yaml:
+                os.unlink(calib_yaml)
+    
+    def _get_tensorrt_engine_path(self, pt_path: Path) -> Optional[Path]:
+        """
+        Obtiene el motor TensorRT (.engine) junto al .pt. Si no existe se
+        exporta una vez (FP16, tamaño fijo) y queda cacheado en disco.
+        """
+        engine_path = pt_path.with_suffix(".engine")
+        if engine_path.exists():
+            print(f"✅ Encontrado motor TensorRT: {engine_path}")
+            return engine_path
+        
+        try:
+            print(f"⏳ Exportando {pt_path.name} a TensorRT (FP16, {self.infer_size}px)...")
+            exported = YOLO(str(pt_path)).export(
+                format="engine", half=True, imgsz=self.infer_size, device=0, workspace=4
+            )
+            return Path(exported)
+        except Exception as e:
+            print(f"⚠️ No se pudo exportar a TensorRT: {e}")
+            return None
+    
+    def _get_onnx_model_path(self, pt_path: Path) -> Optional[Path]:
+        """
+        Obtiene el modelo ONNX (.onnx) junto al .pt. Si no existe se exporta
+        una vez (FP16, grafo simplificado) y queda cacheado en disco.
+        """
+        onnx_path = pt_path.with_suffix(".onnx")
+        if onnx_path.exists():
+            print(f"✅ Encontrado modelo ONNX: {onnx_path}")
+            return onnx_path
+        
+        try:
+            print(f"⏳ Exportando {pt_path.name} a ONNX (FP16, {self.infer_size}px)...")
+            exported = YOLO(str(pt_path)).export(
+                format="onnx", half=True, simplify=True, imgsz=self.infer_size, device=0
+            )
+            return Path(exported)
+        except Exception as e:
+            print(f"⚠️ No se pudo exportar a ONNX: {e}")
+            return None
+    
     def _load_model(self):
         """Carga el modelo YOLO - preferir modelo Pose con keypoints"""
         try:
@@ -123,18 +395,47 @@ class FrameProcessor:
                 if path.exists():
                     self.is_pose_model = "pose" in path.name.lower()
                     self.is_obb_model = "obb" in path.name.lower()
+                    task = "pose" if self.is_pose_model else "obb" if self.is_obb_model else "detect"
+                    
+                    # Con GPU NVIDIA: motor TensorRT (capas fusionadas + FP16)
+                    if self.use_tensorrt:
+                        engine_path = self._get_tensorrt_engine_path(path)
+                        if engine_path:
+                            print(f"📦 Cargando motor TensorRT: {engine_path}")
+                            self.model = YOLO(str(engine_path), task=task)
+                            self.using_openvino = False
+                            self.backend = "tensorrt"
+                            print(f"✅ Modelo {path.name} cargado (TensorRT)")
+                            print(f"   📋 Clases: {self.model.names}")
+                            return
+                    
+                    # Sin TensorRT: ONNX Runtime con CUDAExecutionProvider
+                    if self.use_onnx:
+                        onnx_path = self._get_onnx_model_path(path)
+                        if onnx_path:
+                            print(f"📦 Cargando modelo ONNX: {onnx_path}")
+                            self.model = YOLO(str(onnx_path), task=task)
+                            self.using_openvino = False
+                            self.backend = "onnx"
+                            print(f"✅ Modelo {path.name} cargado (ONNX Runtime CUDA)")
+                            print(f"   📋 Clases: {self.model.names}")
+                            return
                     
                     # Intentar cargar versión OpenVINO si está disponible
                     if self.use_openvino and not self.is_obb_model:
                         # OBB no soporta bien OpenVINO por ahora
-                        openvino_path = self._get_openvino_model_path(path)
+                        openvino_path = None
+                        if self.use_int8:
+                            # Solo CPU: preferir INT8 (instrucciones VNNI)
+                            openvino_path = self._get_openvino_int8_path(path)
+                        if openvino_path is None:
+                            openvino_path = self._get_openvino_model_path(path)
                         if openvino_path:
                             print(f"📦 Cargando modelo OpenVINO: {openvino_path}")
                             # Especificar task explícitamente para OpenVINO
-                            task = "pose" if self.is_pose_model else "detect"
                             self.model = YOLO(str(openvino_path), task=task)
-                            self.is_ready = True
                             self.using_openvino = True  # Marcar que usa OpenVINO
+                            self.backend = "openvino"
                             model_type = "(Pose+OpenVINO)" if self.is_pose_model else "(OpenVINO)"
                             print(f"✅ Modelo {path.name} cargado {model_type}")
                             print(f"   📋 Clases: {self.model.names}")
@@ -143,8 +444,8 @@ class FrameProcessor:
                     # Fallback a modelo PyTorch normal
                     print(f"📦 Cargando modelo YOLO: {path.name}")
                     self.model = YOLO(str(path))
-                    self.is_ready = True
                     self.using_openvino = False
+                    self.backend = "pytorch"
                     model_type = "(Pose)" if self.is_pose_model else "(OBB)" if self.is_obb_model else ""
                     print(f"✅ Modelo {path.name} cargado {model_type}")
                     print(f"   📋 Clases: {self.model.names}")
@@ -153,7 +454,7 @@ class FrameProcessor:
             # Descargar nano si no hay ninguno
             print(f"⚠️ Descargando YOLOv8n (modelo ligero)...")
             self.model = YOLO("yolov8n.pt")
-            self.is_ready = True
+            self.backend = "pytorch"
             self.is_pose_model = False
             self.is_obb_model = False
             print(f"✅ YOLOv8n listo")
@@ -161,280 +462,710 @@ class FrameProcessor:
                 
         except Exception as e:
             print(f"❌ Error cargando YOLO: {e}")
-            self.is_ready = False
+            self.model = None
             self.is_obb_model = False
     
-    def process_frame(self, frame_base64: str) -> Tuple[str, List[Dict]]:
+    def _warmup(self, passes: int = 3):
         """
-        Procesa un frame con YOLO + tracking.
-        El skip de frames se maneja ahora en el servidor (main.py) con buffer único.
+        Ejecuta unas inferencias con un lienzo vacío de forma fija para que
+        el primer frame real no pague la inicialización del backend. Con
+        PyTorch+CUDA activa además cudnn.benchmark: como la entrada siempre es
+        infer_size x infer_size, los kernels se autoajustan una sola vez.
         """
-        self._frame_count += 1
+        if self.backend == "pytorch" and self._cuda:
+            self._torch.backends.cudnn.benchmark = True
         
+        blank = np.full((self.infer_size, self.infer_size, 3), 114, dtype=np.uint8)
         try:
-            result = self._process_sync(frame_base64)
-            
-            self.last_processed_frame = result[0]
-            self.last_detections = result[1]
-            self._process_count += 1
-            
-            # Calcular FPS
-            now = time.time()
-            elapsed = now - self._last_fps_time
-            if elapsed >= 2.0:
-                self._fps = self._process_count / elapsed
-                print(f"📊 YOLO: {self._fps:.1f} FPS procesados")
-                self._process_count = 0
-                self._last_fps_time = now
+            for _ in range(passes):
+                self._infer_stage([(blank, 1.0)], warmup=True)
+            if self.backend == "pytorch" and self.compile_model:
+                self._compile_model()
+            print(f"🔥 Modelo precalentado ({self.backend})")
+        except Exception as e:
+            print(f"⚠️ Error precalentando modelo: {e}")
+    
+    def _compile_model(self):
+        """
+        Especializa el forward de PyTorch con torch.compile para entradas
+        (n, 3, infer_size, infer_size). Cada tamaño de lote es una forma
+        estática distinta, así que se compilan todos aquí y no con el primer
+        lote real de ese tamaño. Se llama desde _warmup, que corre en el thread
+        de inferencia antes de activar is_ready: los grafos CUDA se capturan en
+        el mismo thread que los reproduce y ningún frame ve el modelo a medio
+        compilar. La entrada es la misma que la del camino real (float32 [0, 1]
+        en la GPU, mismos argumentos de _infer_kwargs).
+        """
+        predictor = getattr(self.model, "predictor", None)
+        if predictor is None:  # El warmup no llegó a inicializar el predictor
+            return
+        predictor_model = predictor.model  # AutoBackend
+        torch = self._torch
+        try:
+            predictor_model.model = torch.compile(
+                predictor_model.model, mode="reduce-overhead", dynamic=False
+            )
+            size = self.infer_size
+            for n in range(1, self.max_batch + 1):
+                x = torch.full((n, 3, size, size), 114 / 255.0, device="cuda")
+                self.model(x, **self._infer_kwargs())
+            print(f"⚡ Modelo compilado con torch.compile (lotes 1-{self.max_batch})")
+        except Exception as e:
+            print(f"⚠️ torch.compile no disponible ({e}) - usando modelo sin compilar")
+            predictor_model.model = getattr(predictor_model.model, "_orig_mod", predictor_model.model)
+    
+    def _record_processed(self, results: List[Tuple[bytes, List[Dict], float]]):
+        """Guarda el último resultado y actualiza el contador de FPS"""
+        if not results:
+            return
+        if results[-1][0] is not None:
+            self.last_processed_frame = results[-1][0]
+        self.last_detections = results[-1][1]
+        self._process_count += len(results)
+        
+        # Calcular FPS
+        now = time.time()
+        elapsed = now - self._last_fps_time
+        if elapsed >= 2.0:
+            self._fps = self._process_count / elapsed
+            print(f"📊 YOLO: {self._fps:.1f} FPS procesados")
+            self._process_count = 0
+            self._last_fps_time = now
+    
+    async def process_frame_async(self, frame_bytes: bytes,
+                                  return_frame: bool = True) -> Tuple[Optional[bytes], List[Dict], float]:
+        """
+        Procesa un frame a través del pipeline decode -> inferencia -> encode.
+        Cada etapa corre en su propio thread, así que mientras YOLO infiere un
+        frame se puede decodificar el siguiente y codificar el anterior. Los
+        frames que llegan casi a la vez (varias fuentes) comparten inferencia.
+        Con return_frame=False solo se actualizan los tracks (sin overlay ni JPEG).
+        """
+        loop = asyncio.get_running_loop()
+        if not self._pipeline_tasks or any(task.done() for task in self._pipeline_tasks):
+            self._start_pipeline(loop)
+        
+        self._frame_count += 1
+        digest = frame_digest(frame_bytes)
+        cached = self._last_result
+        if digest == self._last_digest and cached is not None and (cached[0] is not None or not return_frame):
+            return cached
+        
+        future = loop.create_future()
+        await self._decode_queue.put((frame_bytes, return_frame, future))
+        result = await future
+        self._last_digest, self._last_result = digest, result
+        return result
+    
+    async def process_image_async(self, frame: np.ndarray,
+                                  return_frame: bool = True) -> Tuple[Optional[bytes], List[Dict], float]:
+        """
+        Como process_frame_async pero con un frame BGR ya decodificado (p. ej.
+        cámara IP leída con cv2): entra directamente en la etapa de inferencia,
+        sin codificar a JPEG para volver a decodificarlo.
+        Si el frame no se puede procesar devuelve (None, [], 1.0).
+        """
+        loop = asyncio.get_running_loop()
+        if not self._pipeline_tasks or any(task.done() for task in self._pipeline_tasks):
+            self._start_pipeline(loop)
+        
+        self._frame_count += 1
+        future = loop.create_future()
+        decoded = await loop.run_in_executor(self._stage_executors["decode"], self._reduce_frame,
+                                           frame, return_frame)
+        await self._infer_queue.put((decoded, None, return_frame, future))
+        return await future
+    
+    def _start_pipeline(self, loop: asyncio.AbstractEventLoop):
+        """Crea las colas (acotadas: back-pressure) y las tareas de cada etapa"""
+        for task in self._pipeline_tasks:
+            task.cancel()
+        
+        self._decode_queue = asyncio.Queue(maxsize=2)
+        self._infer_queue = asyncio.Queue(maxsize=self.max_batch)
+        self._encode_queue = asyncio.Queue(maxsize=2)
+        self._pipeline_tasks = [
+            loop.create_task(self._decode_loop()),
+            loop.create_task(self._infer_loop()),
+            loop.create_task(self._encode_loop()),
+        ]
+    
+    async def _decode_loop(self):
+        """Etapa 1: JPEG -> frame reducido"""
+        loop = asyncio.get_running_loop()
+        executor = self._stage_executors["decode"]
+        while True:
+            frame_bytes, return_frame, future = await self._decode_queue.get()
+            decoded = None
+            if CV2_AVAILABLE:
+                decoded = await loop.run_in_executor(executor, self._decode_frame,
+                                                     frame_bytes, return_frame)
+            if decoded is None:
+                if not future.done():
+                    future.set_result((frame_bytes, [], 1.0))
+                continue
+            await self._infer_queue.put((decoded, frame_bytes, return_frame, future))
+    
+    async def _infer_loop(self):
+        """Etapa 2: agrupa hasta max_batch frames (esperando batch_timeout) e infiere"""
+        loop = asyncio.get_running_loop()
+        executor = self._stage_executors["infer"]
+        queue = self._infer_queue
+        
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=self.batch_timeout))
+                except asyncio.TimeoutError:
+                    break
             
-            return result
+            decoded = [item[0] for item in batch]
+            try:
+                detections = await loop.run_in_executor(executor, self._infer_stage, decoded)
+            except Exception as e:
+                print(f"⚠️ Error en inferencia YOLO: {e}")
+                detections = [[] for _ in batch]
             
-        except Exception as e:
-            import traceback
-            print(f"❌ Error procesando frame: {type(e).__name__}: {e}")
-            traceback.print_exc()
-            return frame_base64, []
-    
-    def _process_sync(self, frame_base64: str) -> Tuple[str, List[Dict]]:
-        """Procesamiento síncrono del frame - optimizado para velocidad"""
-        if not CV2_AVAILABLE:
-            print("⚠️ OpenCV no disponible")
-            return frame_base64, []
-        
-        # Decodificar
+            for (item, frame_bytes, return_frame, future), frame_detections in zip(batch, detections):
+                await self._encode_queue.put((item, frame_detections, frame_bytes, return_frame, future))
+    
+    async def _encode_loop(self):
+        """Etapa 3: tracking + overlay + JPEG (en orden de llegada)"""
+        loop = asyncio.get_running_loop()
+        executor = self._stage_executors["encode"]
+        while True:
+            (frame, decode_scale), detections, frame_bytes, return_frame, future = await self._encode_queue.get()
+            try:
+                result = await loop.run_in_executor(
+                    executor, self._finish_frame, frame, detections, decode_scale, return_frame
+                )
+                self._record_processed([result])
+            except Exception as e:
+                print(f"❌ Error procesando frame: {type(e).__name__}: {e}")
+                result = (frame_bytes, [], 1.0)
+            if not future.done():
+                future.set_result(result)
+    
+    def _infer_stage(self, decoded: List[Tuple[np.ndarray, float]],
+                     warmup: bool = False) -> List[List[Dict]]:
+        """
+        Reduce, infiere y extrae detecciones de un lote de frames decodificados.
+        warmup=True: precalentado (antes de is_ready y sin comprobar escena estática).
+        """
+        if not self.model or not (self.is_ready or warmup) or not decoded:
+            return [[] for _ in decoded]
+        
+        # Escena sin cambios respecto al último frame inferido: reutilizar sus
+        # detecciones (el tracker las sigue recibiendo y los tracks no caducan).
+        # source[i] = índice del frame inferido cuyas detecciones usa i (-1: anterior)
+        source = []
+        to_infer = []
+        for i, (frame, _) in enumerate(decoded):
+            if not warmup and self._is_static_scene(frame):
+                source.append(to_infer[-1] if to_infer else -1)
+            else:
+                source.append(i)
+                to_infer.append(i)
+        
+        previous = self._last_raw_detections
+        inferred = {}
+        if to_infer:
+            if self._use_pinned():
+                self._ensure_pinned(len(to_infer))
+            prepared = [self._prepare_frame(decoded[i][0], slot) for slot, i in enumerate(to_infer)]
+            results = self._infer([small for small, _ in prepared])
+            # Escala total: original -> decodificado -> inferencia
+            for i, (_, scale), result in zip(to_infer, prepared, results):
+                inferred[i] = self._extract_detections(result, scale * decoded[i][1])
+            self._last_raw_detections = inferred[to_infer[-1]]
+        
+        return [list(inferred[j]) if j >= 0 else list(previous) for j in source]
+    
+    def _is_static_scene(self, frame: np.ndarray) -> bool:
+        """
+        Compara una miniatura 32x32 en gris con la del último frame inferido.
+        Si la diferencia media está por debajo del umbral, YOLO no hace falta
+        (con inferencia forzada cada static_max_skips frames).
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.int16)
+        
+        if (self._ref_thumb is not None and self._static_skips < self.static_max_skips and
+                np.abs(thumb - self._ref_thumb).mean() < self.static_threshold):
+            self._static_skips += 1
+            return True
+        
+        self._ref_thumb = thumb
+        self._static_skips = 0
+        return False
+    
+    def _decode_factor(self, width: int, height: int, preview: bool = True) -> int:
+        """
+        Mayor reducción de la DCT (8, 4, 2) que mantiene el frame >= preview_size
+        (o solo >= infer_size si el frame no se va a devolver).
+        """
+        if not preview:
+            min_side = self.infer_size
+        elif self.annotate_full_res:
+            return 1
+        else:
+            min_side = max(self.infer_size, self.preview_size)
+        for factor in (8, 4, 2):
+            if max(width, height) // factor >= min_side:
+                return factor
+        return 1
+    
+    def _decode_frame(self, frame_bytes: bytes,
+                      preview: bool = True) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Decodifica un frame JPEG directamente a escala reducida
+        (la reducción se hace en la DCT, sin generar el frame completo).
+        Devuelve (frame, decode_scale) con decode_scale = reducido / original.
+        """
         try:
-            frame_bytes = base64.b64decode(frame_base64)
-            nparr = np.frombuffer(frame_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            if self._tj is not None:
+                width, height, _, _ = self._tj.decode_header(frame_bytes)
+                factor = self._decode_factor(width, height, preview)
+                frame = self._tj.decode(frame_bytes, pixel_format=TJPF_BGR,
+                                        scaling_factor=(1, factor))
+            else:
+                # cv2 no expone la cabecera: usar el tamaño del frame anterior
+                # (un stream no cambia de resolución entre frames)
+                factor = self._decode_factor(*self._last_frame_size, preview) if self._last_frame_size else 1
+                nparr = np.frombuffer(frame_bytes, np.uint8)
+                frame = cv2.imdecode(nparr, IMREAD_REDUCED_FLAGS[factor])
         except Exception as e:
             print(f"❌ Error decodificando frame: {e}")
-            return frame_base64, []
+            return None
         
         if frame is None:
             print("⚠️ Frame decodificado es None")
-            return frame_base64, []
+            return None
         
         h, w = frame.shape[:2]
+        self._last_frame_size = (w * factor, h * factor)
+        return frame, 1.0 / factor
+    
+    def _reduce_frame(self, frame: np.ndarray, preview: bool = True) -> Tuple[np.ndarray, float]:
+        """Equivalente a _decode_frame para frames ya decodificados: misma reducción"""
+        h, w = frame.shape[:2]
+        factor = self._decode_factor(w, h, preview)
+        if factor > 1:
+            frame = cv2.resize(frame, (w // factor, h // factor), interpolation=cv2.INTER_AREA)
+        return frame, 1.0 / factor
+    
+    def _use_pinned(self) -> bool:
+        return self.gpu_preprocess and self.backend == "pytorch"
+    
+    def _ensure_pinned(self, n: int):
+        """Reserva (una vez) los lienzos en memoria pinned para n frames"""
+        if self._pinned is None or self._pinned.shape[0] < n:
+            size = self.infer_size
+            torch = self._torch
+            self._pinned = torch.empty(
+                (max(n, self.max_batch), size, size, 3), dtype=torch.uint8
+            ).pin_memory()
+            self._canvas_geom.clear()
+    
+    def _letterbox_canvas(self, slot: int) -> np.ndarray:
+        """Lienzo cuadrado de la posición del lote (vista de la memoria pinned en modo GPU)"""
+        if self._use_pinned():
+            return self._pinned[slot].numpy()
+        canvas = self._canvases.get(slot)
+        if canvas is None:
+            size = self.infer_size
+            canvas = np.empty((size, size, 3), dtype=np.uint8)
+            self._canvases[slot] = canvas
+            self._canvas_geom.pop(slot, None)
+        return canvas
+    
+    def _prepare_frame(self, frame: np.ndarray, slot: int = 0) -> Tuple[np.ndarray, float]:
+        """
+        Letterbox al tamaño de inferencia en una sola pasada. Devuelve
+        (lienzo, scale): el frame reducido queda arriba a la izquierda de un
+        lienzo cuadrado reutilizable por posición del lote, así las cajas
+        salen en coordenadas del frame reducido.
+        """
+        h, w = frame.shape[:2]
+        size = self.infer_size
+        scale = min(size / w, size / h, 1.0)
+        if scale < 1:
+            new_w, new_h = round(w * scale), round(h * scale)
+        else:
+            new_w, new_h = w, h
+            scale = 1.0
+        
+        canvas = self._letterbox_canvas(slot)
+        if self._canvas_geom.get(slot) != (new_h, new_w):
+            # El relleno solo se repinta si cambia la geometría del contenido
+            canvas.fill(114)  # Mismo gris de relleno que el letterbox de YOLO
+            self._canvas_geom[slot] = (new_h, new_w)
+        
+        if scale == 1.0:
+            canvas[:new_h, :new_w] = frame
+        elif new_w == size:
+            # Ancho completo: las primeras filas del lienzo son memoria contigua,
+            # así que el resize escribe directamente en el lienzo
+            cv2.resize(frame, (new_w, new_h), dst=canvas[:new_h], interpolation=cv2.INTER_NEAREST)
+        else:
+            buf = self._small_bufs.get(slot)
+            if buf is None or buf.shape[:2] != (new_h, new_w):
+                buf = np.empty((new_h, new_w, 3), dtype=np.uint8)
+                self._small_bufs[slot] = buf
+            cv2.resize(frame, (new_w, new_h), dst=buf, interpolation=cv2.INTER_NEAREST)
+            canvas[:new_h, :new_w] = buf
+        return canvas, scale
+    
+    def _infer(self, smalls: List[np.ndarray]) -> List:
+        """
+        Ejecuta el modelo sobre una lista de frames. Con PyTorch se hace un
+        único forward por lote; los modelos exportados (OpenVINO/TensorRT)
+        tienen batch fijo de 1, así que se llaman frame a frame.
+        """
+        if not smalls:
+            return []
+        
+        kwargs = self._infer_kwargs()
+        try:
+            if self.backend == "pytorch":
+                if self._use_pinned():
+                    return list(self.model(self._to_device_tensor(len(smalls)), **kwargs))
+                return list(self.model(self._to_blob(smalls), **kwargs))
+            blob = self._to_blob(smalls)
+            return [self.model(blob[i:i + 1], **kwargs)[0] for i in range(len(smalls))]
+        except Exception as e:
+            print(f"⚠️ Error en inferencia YOLO: {e}")
+            return [None] * len(smalls)
+    
+    def _infer_kwargs(self) -> Dict:
+        """Argumentos de inferencia (compartidos con la compilación del modelo)"""
+        # Inferencia optimizada - aumentar confianza para menos falsos positivos
+        return dict(
+            conf=self.confidence,
+            verbose=False,
+            imgsz=self.infer_size,
+            max_det=5,       # Menos detecciones = más rápido
+            half=False,      # Entrada float32: la misma con la que se compila
+            agnostic_nms=True,  # NMS más rápido
+        )
+    
+    def _to_device_tensor(self, n: int):
+        """
+        Sube los n primeros lienzos pinned (BGR uint8, ya con letterbox) y hace
+        en la GPU el paso a RGB, NCHW y float [0, 1]: se sube 1 byte por canal
+        en vez de 4.
+        """
+        x = self._pinned[:n].to("cuda", non_blocking=True)
+        return x.flip(-1).permute(0, 3, 1, 2).contiguous().float().div_(255.0)
+    
+    def _to_blob(self, smalls: List[np.ndarray]):
+        """
+        BGR->RGB, HWC->NCHW y float [0, 1] de todos los lienzos en una sola
+        pasada en C++ (cv2.dnn), en vez de los pasos separados del
+        preprocesado de Ultralytics.
+        """
+        blob = cv2.dnn.blobFromImages(smalls, scalefactor=1.0 / 255.0, swapRB=True)
+        return self._torch.from_numpy(blob)
+    
+    def _extract_detections(self, result, scale: float) -> List[Dict]:
+        """Convierte el resultado de YOLO a detecciones en coordenadas del frame"""
+        if result is None:
+            return []
+        if self._unpack is None:
+            self._bind_result_unpacker()
+        return self._unpack(result, scale)
+    
+    def _bind_result_unpacker(self):
+        """
+        El tipo de modelo no cambia tras cargarlo: elegir aquí el desempaquetado
+        de resultados (pose, OBB o cajas) y cachear los nombres de clase.
+        """
+        self._names = self.model.names
+        branch = "pose" if self.is_pose_model else "obb" if self.is_obb_model else "boxes"
+        self._unpack = getattr(self, f"_unpack_{branch}")
+    
+    def _unpack_pose(self, result, scale: float) -> List[Dict]:
+        """Modelo Pose: orientación desde el keypoint frontal"""
+        detections = []
+        if result.keypoints is None or not len(result.boxes):
+            return detections
+        names = self._names
+        
+        # Una sola copia GPU->CPU por tensor (no una por caja): el bucle solo
+        # empaqueta listas ya convertidas
+        # boxes.data = [x1, y1, x2, y2, conf, cls]: una copia para todo
+        data = result.boxes.data.cpu().numpy()
+        keep = self._nms_keep(data[:, :4], data[:, -2])
+        data = data[keep]
+        xyxy = (data[:, :4] / scale).astype(np.int32)
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) // 2
+        confs = data[:, -2]
+        clss = data[:, -1].astype(np.int32)
+        kpts = result.keypoints.xy.cpu().numpy()[keep]  # (N, K, 2)
+        
+        # Keypoint de orientación (punto frontal) = keypoint 0
+        if kpts.shape[1] > 0:
+            fronts = kpts[:, 0, :] / scale
+            valid = (fronts[:, 0] > 0) & (fronts[:, 1] > 0)  # Keypoint válido
+            # Ángulo desde el centro hacia el keypoint
+            delta = fronts - centers
+            orientations = np.where(valid, np.degrees(np.arctan2(delta[:, 1], delta[:, 0])), 0.0)
+            fronts = fronts.astype(np.int32)
+        else:
+            valid = np.zeros(len(xyxy), dtype=bool)
+            orientations = np.zeros(len(xyxy))
+            fronts = np.zeros((len(xyxy), 2), dtype=np.int32)
+        
+        for (x1, y1, x2, y2), (cx, cy), conf, cls, orientation, ok, (fx, fy) in zip(
+                xyxy.tolist(), centers.tolist(), confs.tolist(), clss.tolist(),
+                orientations.tolist(), valid.tolist(), fronts.tolist()):
+            detections.append({
+                "class": names.get(cls, "miniature"),
+                "confidence": conf,
+                "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+                "center": {"x": cx, "y": cy},
+                "orientation": orientation,
+                "front_point": {"x": fx, "y": fy} if ok else None,
+                "is_pose": True
+            })
+        
+        return detections
+    
+    def _unpack_obb(self, result, scale: float) -> List[Dict]:
+        """Modelo OBB: orientación a partir del ángulo de la caja"""
         detections = []
+        if result.obb is None or not len(result.obb):
+            return detections
+        names = self._names
+        
+        # obb.data = [cx, cy, w, h, r, conf, cls]
+        data = result.obb.data.cpu().numpy()
+        half = data[:, 2:4] / 2
+        data = data[self._nms_keep(np.hstack([data[:, :2] - half, data[:, :2] + half]), data[:, -2])]
+        xywhr = data[:, :5]
+        cx, cy = xywhr[:, 0] / scale, xywhr[:, 1] / scale
+        half_w, half_h = xywhr[:, 2] / (2 * scale), xywhr[:, 3] / (2 * scale)
+        angles = np.degrees(xywhr[:, 4])
+        corners = np.stack([cx - half_w, cy - half_h, cx + half_w, cy + half_h], axis=1)
+        corners = corners.astype(np.int32)
+        centers = np.stack([cx, cy], axis=1).astype(np.int32)
+        confs = data[:, -2]
+        clss = data[:, -1].astype(np.int32)
+        
+        for (x1, y1, x2, y2), (icx, icy), angle_deg, conf, cls in zip(
+                corners.tolist(), centers.tolist(), angles.tolist(),
+                confs.tolist(), clss.tolist()):
+            detections.append({
+                "class": names.get(cls, "miniature"),
+                "confidence": conf,
+                "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+                "center": {"x": icx, "y": icy},
+                "orientation": angle_deg,
+                "is_obb": True
+            })
+        
+        return detections
+    
+    def _unpack_boxes(self, result, scale: float) -> List[Dict]:
+        """Detección normal (boxes) - sin orientación"""
+        detections = []
+        if result.boxes is None or not len(result.boxes):
+            return detections
+        names = self._names
+        
+        data = result.boxes.data.cpu().numpy()
+        data = data[self._nms_keep(data[:, :4], data[:, -2])]
+        xyxy = (data[:, :4] / scale).astype(np.int32)
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) // 2
+        confs = data[:, -2]
+        clss = data[:, -1].astype(np.int32)
+        
+        for (x1, y1, x2, y2), (cx, cy), conf, cls in zip(
+                xyxy.tolist(), centers.tolist(), confs.tolist(), clss.tolist()):
+            # Sin OBB, orientación es 0
+            detections.append({
+                "class": names.get(cls, "miniature"),
+                "confidence": conf,
+                "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+                "center": {"x": cx, "y": cy},
+                "orientation": 0.0,
+                "is_obb": False
+            })
+        
+        return detections
+    
+    def _finish_frame(self, frame: np.ndarray, detections: List[Dict], view_scale: float = 1.0,
+                      return_frame: bool = True) -> Tuple[Optional[bytes], List[Dict], float]:
+        """
+        Tracking, overlay y codificación de un frame ya inferido.
+        Los tracks están en coordenadas del frame original; view_scale las
+        lleva al frame (reducido) sobre el que se dibuja.
+        """
+        # Actualizar tracker con detecciones
+        tracked_objects, self.last_tracks = self.tracker.update(detections)
+        
+        # Nadie va a mostrar el frame: ni overlay ni JPEG
+        if not return_frame:
+            return None, self.last_tracks, view_scale
+        
+        h, w = frame.shape[:2]
         
         # Info de debug en frame
         model_status = "LISTO" if self.is_ready else "NO CARGADO"
         model_type = "Pose" if self.is_pose_model else "OBB" if self.is_obb_model else "Normal"
         if self.using_openvino:
             model_type += "+OV"
+        elif self.backend == "tensorrt":
+            model_type += "+TRT"
+        elif self.backend == "onnx":
+            model_type += "+ONNX"
         
-        if self.is_ready and self.model:
-            # Usar 320 para todos (modelo OpenVINO ahora exportado a 320)
-            infer_size = 320
-            max_size = infer_size
-            scale = min(max_size / w, max_size / h, 1.0)
-            
-            if scale < 1:
-                small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
-            else:
-                small = frame
-                scale = 1.0
-            
-            try:
-                # Inferencia optimizada - aumentar confianza para menos falsos positivos
-                results = self.model(
-                    small,
-                    conf=self.confidence,
-                    verbose=False,
-                    imgsz=infer_size,
-                    max_det=5,       # Menos detecciones = más rápido
-                    half=False,
-                    agnostic_nms=True,  # NMS más rápido
-                )
-            except Exception as e:
-                print(f"⚠️ Error en inferencia YOLO: {e}")
-                results = []
-            
-            for result in results:
-                # Procesar Pose (keypoints) - PRIORIDAD
-                if hasattr(result, 'keypoints') and result.keypoints is not None and len(result.boxes):
-                    for i, (box, kpts) in enumerate(zip(result.boxes, result.keypoints.xy)):
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        x1, y1, x2, y2 = int(x1/scale), int(y1/scale), int(x2/scale), int(y2/scale)
-                        
-                        conf = float(box.conf[0])
-                        cls = int(box.cls[0])
-                        name = result.names.get(cls, "miniature")
-                        
-                        # Centro del bbox
-                        cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
-                        
-                        # Keypoint de orientación (punto frontal)
-                        orientation = 0.0
-                        front_point = None
-                        if len(kpts) > 0:
-                            fx, fy = float(kpts[0][0]) / scale, float(kpts[0][1]) / scale
-                            if fx > 0 and fy > 0:  # Keypoint válido
-                                front_point = {"x": int(fx), "y": int(fy)}
-                                # Calcular ángulo desde centro hacia keypoint
-                                dx = fx - cx
-                                dy = fy - cy
-                                orientation = float(np.degrees(np.arctan2(dy, dx)))
-                        
-                        detections.append({
-                            "class": name,
-                            "confidence": round(conf, 2),
-                            "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
-                            "center": {"x": cx, "y": cy},
-                            "orientation": round(orientation, 1),
-                            "front_point": front_point,
-                            "is_pose": True
-                        })
-                
-                # Procesar OBB (Oriented Bounding Boxes)
-                elif hasattr(result, 'obb') and result.obb is not None and len(result.obb):
-                    for i in range(len(result.obb)):
-                        xywhr = result.obb.xywhr[i].cpu().numpy()
-                        cx, cy, bw, bh, rotation = xywhr
-                        cx, cy, bw, bh = cx/scale, cy/scale, bw/scale, bh/scale
-                        angle_deg = float(rotation) * 180 / np.pi
-                        
-                        conf = float(result.obb.conf[i])
-                        cls = int(result.obb.cls[i])
-                        name = result.names.get(cls, "miniature")
-                        
-                        x1 = int(cx - bw/2)
-                        y1 = int(cy - bh/2)
-                        x2 = int(cx + bw/2)
-                        y2 = int(cy + bh/2)
-                        
-                        detections.append({
-                            "class": name,
-                            "confidence": round(conf, 2),
-                            "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
-                            "center": {"x": int(cx), "y": int(cy)},
-                            "orientation": round(angle_deg, 1),
-                            "is_obb": True
-                        })
-                
-                # Fallback: detección normal (boxes) - sin orientación
-                elif hasattr(result, 'boxes') and result.boxes is not None:
-                    for box in result.boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        x1, y1, x2, y2 = int(x1/scale), int(y1/scale), int(x2/scale), int(y2/scale)
-                        conf = float(box.conf[0])
-                        cls = int(box.cls[0])
-                        name = result.names.get(cls, "miniature")
-                        
-                        # Sin OBB, orientación es 0
-                        detections.append({
-                            "class": name,
-                            "confidence": round(conf, 2),
-                            "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
-                            "center": {"x": (x1+x2)//2, "y": (y1+y2)//2},
-                            "orientation": 0.0,
-                            "is_obb": False
-                        })
-        
-        # Eliminar detecciones duplicadas (NMS manual)
-        detections = self._remove_duplicates(detections)
+        # Geometría de todos los tracks de una vez: cajas, centros y flechas
+        n = len(tracked_objects)
+        boxes = np.array([t.bbox for t in tracked_objects], dtype=np.float32).reshape(-1, 4)
+        boxes = (boxes * view_scale).astype(np.int32)
+        centers = np.array([t.center for t in tracked_objects], dtype=np.float32).reshape(-1, 2)
+        centers = (centers * view_scale).astype(np.int32)
         
-        # Actualizar tracker con detecciones
-        tracked_objects = self.tracker.update(detections)
-        self.last_tracks = [t.to_dict() for t in tracked_objects]
+        # Dirección de las flechas de orientación: una sola consulta a la LUT
+        # (grados enteros) para todos los tracks
+        angle_idx = np.fromiter(
+            (round(t.orientation) % 360 for t in tracked_objects), dtype=np.intp, count=n
+        )
+        arrow_dirs = np.stack([ARROW_COS_LUT.take(angle_idx), ARROW_SIN_LUT.take(angle_idx)], axis=1)
+        arrow_lens = np.maximum(int(30 * view_scale),
+                                np.minimum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]) // 2)
+        arrow_ends = (centers + arrow_lens[:, np.newaxis] * arrow_dirs).astype(np.int32)
         
-        # Dibujar tracks en el frame
-        for track in tracked_objects:
-            x1, y1, x2, y2 = track.bbox
-            color = self._get_color(track.id)
-            
-            # Bounding box
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            
+        # Bounding boxes escritos directamente en el buffer
+        colors = [self._get_color(t.id) for t in tracked_objects]
+        self._draw_boxes(frame, boxes, colors)
+        
+        # Texto y flechas (cv2 por track: no se pueden agrupar)
+        for track, color, (x1, y1, x2, y2), (cx, cy), (end_x, end_y) in zip(
+                tracked_objects, colors, boxes.tolist(), centers.tolist(), arrow_ends.tolist()):
             # ID 
             label = f"#{track.id}"
             cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
             
-            # Flecha de orientación - OBB usa ángulo directo del modelo
-            cx, cy = track.center
-            # El ángulo OBB viene en radianes convertido a grados, 0 = horizontal derecha
-            angle_rad = np.radians(track.orientation)
-            arrow_len = max(30, min(x2-x1, y2-y1) // 2)
-            end_x = int(cx + arrow_len * np.cos(angle_rad))
-            end_y = int(cy + arrow_len * np.sin(angle_rad))
+            # Flecha de orientación (0° = horizontal derecha)
             cv2.arrowedLine(frame, (cx, cy), (end_x, end_y), (0, 255, 255), 2, tipLength=0.3)
             
             # Mostrar ángulo
             angle_text = f"{track.orientation:.0f}°"
             cv2.putText(frame, angle_text, (x2+5, y1+15), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
         
+        # Textos de estado: cambian poco (fps cada 2 s), se rasterizan una vez
+        # y se copian con una máscara
         if not self.is_ready:
-            cv2.putText(frame, f"YOLO: {model_status}", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+            self._blit_text(frame, f"YOLO: {model_status}", (10, 30), 0.8, (0, 0, 255), 2)
         
         # Overlay info - SIEMPRE mostrar
         info = f"Tracks: {len(tracked_objects)} | YOLO: {self._fps:.1f} fps | {model_type}"
-        cv2.putText(frame, info, (10, h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        self._blit_text(frame, info, (10, h - 10), 0.5, (0, 255, 0), 2)
         
         # Mostrar estado del modelo arriba a la derecha
         status_color = (0, 255, 0) if self.is_ready else (0, 0, 255)
-        cv2.putText(frame, model_status, (w - 100, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, status_color, 2)
+        self._blit_text(frame, model_status, (w - 100, 25), 0.5, status_color, 2)
         
         # Codificar (calidad reducida para velocidad)
-        _, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-        return base64.b64encode(buf).decode('utf-8'), self.last_tracks
+        return self._encode_jpeg(frame), self.last_tracks, view_scale
+    
+    def _blit_text(self, frame: np.ndarray, text: str, org: Tuple[int, int],
+                   font_scale: float, color: Tuple[int, int, int], thickness: int):
+        """
+        Equivalente a cv2.putText con FONT_HERSHEY_SIMPLEX, pero la máscara
+        del texto se rasteriza una sola vez por (texto, escala, grosor) y
+        después solo se copia el color sobre sus píxeles.
+        """
+        key = (text, font_scale, thickness)
+        cached = self._text_masks.get(key)
+        if cached is None:
+            (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+            pad = thickness
+            patch = np.zeros((th + baseline + 2 * pad, tw + 2 * pad), dtype=np.uint8)
+            cv2.putText(patch, text, (pad, th + pad), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, thickness)
+            cached = (patch.astype(bool), th + pad, pad)
+            if len(self._text_masks) >= 64:  # Los textos con fps/tracks van cambiando
+                self._text_masks.clear()
+            self._text_masks[key] = cached
+        
+        mask, top, left = cached
+        h, w = frame.shape[:2]
+        y0, x0 = org[1] - top, org[0] - left
+        # Recortar la máscara a los límites del frame
+        my0, mx0 = max(0, -y0), max(0, -x0)
+        y0, x0 = max(0, y0), max(0, x0)
+        y1 = min(h, y0 + mask.shape[0] - my0)
+        x1 = min(w, x0 + mask.shape[1] - mx0)
+        if y1 <= y0 or x1 <= x0:
+            return
+        frame[y0:y1, x0:x1][mask[my0:my0 + y1 - y0, mx0:mx0 + x1 - x0]] = color
+    
+    @staticmethod
+    def _draw_boxes(frame: np.ndarray, boxes: np.ndarray,
+                    colors: List[Tuple[int, int, int]], thickness: int = 2):
+        """
+        Dibuja rectángulos escribiendo los bordes con slicing de numpy en vez
+        de una llamada a cv2.rectangle por track. Los bordes crecen hacia dentro
+        de la caja y se recortan a los límites del frame.
+        """
+        if not len(boxes):
+            return
+        h, w = frame.shape[:2]
+        boxes = boxes.copy()
+        boxes[:, 0::2] = np.clip(boxes[:, 0::2], 0, w - 1)
+        boxes[:, 1::2] = np.clip(boxes[:, 1::2], 0, h - 1)
+        
+        for (x1, y1, x2, y2), color in zip(boxes.tolist(), colors):
+            x2, y2 = x2 + 1, y2 + 1  # bordes inclusivos como cv2.rectangle
+            frame[y1:min(y1 + thickness, y2), x1:x2] = color
+            frame[max(y2 - thickness, y1):y2, x1:x2] = color
+            frame[y1:y2, x1:min(x1 + thickness, x2)] = color
+            frame[y1:y2, max(x2 - thickness, x1):x2] = color
+    
+    def _encode_jpeg(self, frame: np.ndarray) -> bytes:
+        """Codifica a JPEG con libjpeg-turbo si está disponible, si no con cv2"""
+        if self._tj is not None:
+            # Croma 4:2:0 (TurboJPEG usa 4:2:2 por defecto): menos datos que
+            # codificar y el mismo submuestreo que cv2.imencode
+            return self._tj.encode(frame, quality=self.jpeg_quality, pixel_format=TJPF_BGR,
+                                   jpeg_subsample=TJSAMP_420)
+        _, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buf.tobytes()
     
     def get_tracks(self) -> List[Dict]:
         """Retorna los tracks actuales"""
         return self.last_tracks
     
-    def _remove_duplicates(self, detections: List[Dict], iou_threshold: float = 0.5) -> List[Dict]:
+    @staticmethod
+    def _nms_keep(boxes: np.ndarray, confs: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
         """
-        Elimina detecciones duplicadas usando IoU.
-        Mantiene la de mayor confianza.
+        Elimina detecciones duplicadas usando IoU sobre los arrays del modelo
+        (antes de crear ningún dict). Devuelve los índices conservados, de
+        mayor a menor confianza.
         """
-        if len(detections) <= 1:
-            return detections
-        
-        # Ordenar por confianza descendente
-        detections = sorted(detections, key=lambda x: x.get("confidence", 0), reverse=True)
-        
-        keep = []
-        for det in detections:
-            is_duplicate = False
-            b1 = det["bbox"]
-            
-            for kept in keep:
-                b2 = kept["bbox"]
-                
-                # Calcular IoU
-                x1 = max(b1["x1"], b2["x1"])
-                y1 = max(b1["y1"], b2["y1"])
-                x2 = min(b1["x2"], b2["x2"])
-                y2 = min(b1["y2"], b2["y2"])
-                
-                inter = max(0, x2 - x1) * max(0, y2 - y1)
-                area1 = (b1["x2"] - b1["x1"]) * (b1["y2"] - b1["y1"])
-                area2 = (b2["x2"] - b2["x1"]) * (b2["y2"] - b2["y1"])
-                union = area1 + area2 - inter
-                
-                iou = inter / union if union > 0 else 0
-                
-                if iou > iou_threshold:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                keep.append(det)
+        if len(boxes) <= 1:
+            return np.arange(len(boxes))
         
-        return keep
+        # NMS en C++ (cv2.dnn trabaja con rectángulos x, y, w, h)
+        rects = boxes.astype(np.float32)
+        rects[:, 2:] -= rects[:, :2]
+        keep = cv2.dnn.NMSBoxes(rects.tolist(), confs.tolist(), score_threshold=0.0,
+                                nms_threshold=iou_threshold)
+        return np.asarray(keep, dtype=np.intp).ravel()
     
-    def _get_color(self, id_or_cls: int) -> Tuple[int, int, int]:
-        colors = [(0,255,0), (255,0,0), (0,0,255), (255,255,0), 
-                  (255,0,255), (0,255,255), (128,0,255), (255,128,0),
-                  (0,128,255), (255,0,128), (128,255,0), (0,255,128)]
-        return colors[id_or_cls % len(colors)]
+    @staticmethod
+    def _get_color(id_or_cls: int) -> Tuple[int, int, int]:
+        return TRACK_COLORS[id_or_cls % len(TRACK_COLORS)]
     
     def get_status(self) -> Dict:
         return {
             "cv2_available": CV2_AVAILABLE,
             "yolo_available": YOLO_AVAILABLE,
             "model_ready": self.is_ready,
+            "backend": self.backend,
             "fps": round(self._fps, 1),
             "frames_received": self._frame_count,
             "active_tracks": len(self.last_tracks),
@@ -442,5 +1173,6 @@ class FrameProcessor:
         }
 
 
-# Instancia global
-frame_processor = FrameProcessor()
+# Instancia global: el modelo se carga en segundo plano al arrancar el
+# servidor (main.lifespan), no al importar el módulo
+frame_processor = FrameProcessor(load_model=False)
@@ -3,18 +3,119 @@ MesaRPG - Gestión del estado del juego
 Mantiene el estado sincronizado entre todos los componentes
 """
 
+import copy
+import functools
 import json
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, List, Callable, Any
+from typing import Dict, DefaultDict, Optional, List, Callable, Any
+import itertools
+import os
+import secrets
+import tempfile
 import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 from .models import (
     GameState, Character, CharacterSheet, CharacterStatus, Player, Ability, Position,
     GameAction, DetectedMarker, PlayerRole, ActionResult
 )
 
+# Movimiento mínimo de un marcador para volver a notificar su posición
+POSITION_BROADCAST_MIN_PX = 5.0
+ROTATION_BROADCAST_MIN_DEG = 2.0
+
+
+@functools.lru_cache(maxsize=32)
+def _load_json_cached(path_str: str, mtime_ns: int) -> Any:
+    """
+    Lee y parsea un JSON de configuración. La clave incluye el mtime, así que
+    un fichero modificado se vuelve a leer. El resultado es compartido: no
+    mutarlo.
+    """
+    return _read_json_file(Path(path_str))
+
+
+def _load_json(path: Path) -> Any:
+    return _load_json_cached(str(path), path.stat().st_mtime_ns)
+
+
+def _load_json_if_exists(path: Path) -> Any:
+    return _load_json(path) if path.exists() else None
+
+
+def _read_json_file(path: Path) -> Any:
+    """Lee un JSON (bloqueante: llamar desde un hilo)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _scan_maps_dir(maps_dir: Path) -> Dict[str, int]:
+    """map_id -> st_mtime_ns de cada mapa (bloqueante: llamar desde un hilo)"""
+    with os.scandir(maps_dir) as entries:
+        return {
+            entry.name[:-len(".json")]: entry.stat().st_mtime_ns
+            for entry in entries
+            if entry.name.endswith(".json") and entry.is_file()
+        }
+
+
+def _map_summary(map_id: str, map_data: dict) -> dict:
+    return {
+        "id": map_id,
+        "name": map_data.get("name", map_id),
+        "width": map_data.get("width", 20),
+        "height": map_data.get("height", 15),
+        "type": map_data.get("type", "custom"),
+        "created_at": map_data.get("created_at"),
+        "updated_at": map_data.get("updated_at")
+    }
+
+
+def _write_json_file(path: Path, data: Any):
+    """
+    Escribe un JSON indentado en UTF-8 (bloqueante: llamar desde un hilo).
+    Se escribe a un temporal único (dos guardados simultáneos no comparten
+    fichero) y se renombra: un corte nunca deja el fichero a medias.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        if ORJSON_AVAILABLE:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        # mkstemp crea el fichero con 0600: conservar los permisos habituales
+        os.chmod(tmp, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _is_small_move(old: Position, new: Position) -> bool:
+    """True si el cambio de posición/rotación no merece un broadcast"""
+    drot = abs(new.rotation - old.rotation) % 360.0
+    return (
+        abs(new.x - old.x) < POSITION_BROADCAST_MIN_PX and
+        abs(new.y - old.y) < POSITION_BROADCAST_MIN_PX and
+        min(drot, 360.0 - drot) < ROTATION_BROADCAST_MIN_DEG
+    )
+
 
 class GameStateManager:
     """
@@ -26,10 +127,33 @@ class GameStateManager:
         self.config_path = Path(config_path)
         self.state = GameState(session_id=str(uuid.uuid4()))
         self.abilities: Dict[str, Ability] = {}
+        self._ability_static: Dict[str, dict] = {}  # ability_id -> campos fijos para el frontend
         self.character_templates: Dict[int, dict] = {}  # marker_id -> template
         self.game_systems: Dict[str, dict] = {}  # Sistemas de juego disponibles
-        self.cooldowns: Dict[str, Dict[str, int]] = {}  # character_id -> {ability_id: turns_left}
+        self.cooldowns: DefaultDict[str, Dict[str, int]] = defaultdict(dict)  # character_id -> {ability_id: ronda en que expira}
+        # Rondas de combate transcurridas; a diferencia de current_turn no se reinicia
+        # al empezar otro combate, así los cooldowns pendientes se conservan
+        self._round_clock = 0
         self.callbacks: List[Callable] = []
+        # Clasificados al registrar para no inspeccionarlos en cada notificación
+        self._sync_callbacks: List[Callable] = []
+        self._async_callbacks: List[Callable] = []
+        
+        # Índices secundarios (evitan recorrer todas las fichas/personajes)
+        self._sheet_by_player: Dict[str, str] = {}  # player_id -> sheet_id (la primera)
+        self._char_by_marker: Dict[int, str] = {}   # marker_id -> character_id
+        self._chars_by_owner: Dict[str, set] = {}   # player_id -> {character_id}
+        self._last_broadcast_pos: Dict[str, Position] = {}  # character_id -> última posición notificada
+        # Fichas por estado (dicts como conjuntos ordenados de sheet_id)
+        self._pending_ids: Dict[str, None] = {}
+        self._approved_ids: Dict[str, None] = {}  # APPROVED o IN_GAME
+        # Fichas ya serializadas (sheet_id -> dict); solo se rehacen al modificarlas
+        self._sheet_json: Dict[str, dict] = {}
+        # Lista de sistemas para el frontend (game_systems no cambia tras cargar)
+        self._available_systems_cache: Optional[List[dict]] = None
+        # Listado de mapas (map_id -> resumen); se rehace si cambia el mtime del directorio
+        self._maps_index: Optional[Dict[str, dict]] = None
+        self._maps_mtimes: Dict[str, int] = {}  # map_id -> st_mtime_ns del resumen
         
         # Cargar configuración
         self._load_config()
@@ -37,60 +161,107 @@ class GameStateManager:
     def _load_config(self):
         """Carga la configuración desde archivos JSON"""
         try:
+            # Leer los ficheros en paralelo (el arranque espera al más lento, no a la suma)
+            files = [
+                self.config_path / "game_systems.json",
+                self.config_path / "characters.json",
+                self.config_path / "abilities.json",
+                self.config_path / "settings.json",
+            ]
+            with ThreadPoolExecutor(max_workers=len(files)) as pool:
+                systems_data, chars_data, abilities_data, settings_data = pool.map(
+                    _load_json_if_exists, files
+                )
+            
             # Cargar sistemas de juego
-            systems_file = self.config_path / "game_systems.json"
-            if systems_file.exists():
-                with open(systems_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.game_systems = data.get("systems", {})
+            if systems_data is not None:
+                self.game_systems = systems_data.get("systems", {})
             
-            # Cargar personajes (templates legacy)
-            chars_file = self.config_path / "characters.json"
-            if chars_file.exists():
-                with open(chars_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for marker_id, char_data in data.items():
-                        self.character_templates[int(marker_id)] = char_data
+            # Cargar personajes (templates legacy). El dict del loader es
+            # compartido por la caché: copia propia para poder modificarlos
+            if chars_data is not None:
+                for marker_id, char_data in chars_data.items():
+                    self.character_templates[int(marker_id)] = copy.deepcopy(char_data)
             
             # Cargar habilidades
-            abilities_file = self.config_path / "abilities.json"
-            if abilities_file.exists():
-                with open(abilities_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for ability_id, ability_data in data.items():
-                        ability_data['id'] = ability_id
-                        self.abilities[ability_id] = Ability(**ability_data)
+            if abilities_data is not None:
+                for ability_id, ability_data in abilities_data.items():
+                    self.abilities[ability_id] = Ability(**{**ability_data, 'id': ability_id})
+                self._build_ability_static()
             
             # Cargar configuración general
-            settings_file = self.config_path / "settings.json"
-            if settings_file.exists():
-                with open(settings_file, 'r', encoding='utf-8') as f:
-                    self.state.settings = json.load(f)
+            if settings_data is not None:
+                # Los settings se modifican en partida: copia propia
+                self.state.settings = copy.deepcopy(settings_data)
                     
             print(f"✅ Configuración cargada: {len(self.character_templates)} personajes, {len(self.abilities)} habilidades, {len(self.game_systems)} sistemas")
             
         except Exception as e:
             print(f"⚠️ Error cargando configuración: {e}")
     
+    def _build_ability_static(self):
+        """Precalcula la parte fija del dict de cada habilidad"""
+        for ability_id, ability in self.abilities.items():
+            # cooldown_left y can_use se sobrescriben en cada llamada (mantienen su posición)
+            self._ability_static[ability_id] = {
+                "id": ability_id,
+                "name": ability.name,
+                "description": ability.description,
+                "mana_cost": ability.mana_cost,
+                "damage": ability.damage,
+                "heal": ability.heal,
+                "range": ability.range,
+                "aoe": ability.aoe,
+                "cooldown": ability.cooldown,
+                "cooldown_left": 0,
+                "can_use": False,
+                "effect_type": ability.effect_type
+            }
+    
+    def reload_config(self):
+        """Vuelve a leer la configuración desde disco (descarta la caché)"""
+        _load_json_cached.cache_clear()
+        self.abilities.clear()
+        self._ability_static.clear()
+        self.character_templates.clear()
+        self.game_systems = {}
+        self._available_systems_cache = None
+        self._load_config()
+    
     def on_state_change(self, callback: Callable):
         """Registra un callback para cambios de estado"""
         self.callbacks.append(callback)
+        if asyncio.iscoroutinefunction(callback):
+            self._async_callbacks.append(callback)
+        else:
+            self._sync_callbacks.append(callback)
     
     async def _notify_change(self, change_type: str, data: dict):
         """Notifica a todos los callbacks de un cambio"""
-        for callback in self.callbacks:
+        for callback in self._sync_callbacks:
             try:
-                if asyncio.iscoroutinefunction(callback):
-                    await callback(change_type, data)
-                else:
-                    callback(change_type, data)
+                callback(change_type, data)
             except Exception as e:
                 print(f"Error en callback: {e}")
+        
+        if not self._async_callbacks:
+            return
+        # Los callbacks async se lanzan a la vez en lugar de uno tras otro
+        results = await asyncio.gather(
+            *(callback(change_type, data) for callback in self._async_callbacks),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error en callback: {result}")
     
     # === Gestión de Sistemas de Juego ===
     
     def get_available_systems(self) -> List[dict]:
-        """Obtiene los sistemas de juego disponibles"""
+        """Obtiene los sistemas de juego disponibles (calculado una vez)"""
+        if self._available_systems_cache is not None:
+            return self._available_systems_cache
+        
         result = []
         for sys_id, sys_data in self.game_systems.items():
             # Extraer campos planos del characterSheet para el frontend
@@ -108,6 +279,7 @@ class GameStateManager:
                 "gridType": sys_data.get("gridType"),
                 "character_template": character_template
             })
+        self._available_systems_cache = result
         return result
     
     def get_system_config(self, system_id: str) -> Optional[dict]:
@@ -130,7 +302,7 @@ class GameStateManager:
     
     async def create_character_sheet(self, player_id: str, player_name: str, sheet_data: dict) -> CharacterSheet:
         """Crea una nueva ficha de personaje"""
-        sheet_id = str(uuid.uuid4())[:8]
+        sheet_id = secrets.token_hex(4)
         sheet = CharacterSheet(
             id=sheet_id,
             player_id=player_id,
@@ -140,7 +312,8 @@ class GameStateManager:
             status=CharacterStatus.DRAFT
         )
         self.state.character_sheets[sheet_id] = sheet
-        await self._notify_change("sheet_created", {"sheet": self._serialize_sheet(sheet)})
+        self._sheet_by_player.setdefault(player_id, sheet_id)
+        await self._notify_change("sheet_created", {"sheet": self._sheet_changed(sheet)})
         return sheet
     
     async def update_character_sheet(self, sheet_id: str, sheet_data: dict, player_id: str) -> Optional[CharacterSheet]:
@@ -161,9 +334,9 @@ class GameStateManager:
         
         sheet.data = sheet_data
         sheet.updated_at = datetime.now()
-        sheet.status = CharacterStatus.DRAFT  # Vuelve a borrador si estaba rechazada
+        self._set_sheet_status(sheet, CharacterStatus.DRAFT)  # Vuelve a borrador si estaba rechazada
         
-        await self._notify_change("sheet_updated", {"sheet": self._serialize_sheet(sheet)})
+        await self._notify_change("sheet_updated", {"sheet": self._sheet_changed(sheet)})
         return sheet
     
     async def submit_character_sheet(self, sheet_id: str, player_id: str) -> bool:
@@ -175,10 +348,10 @@ class GameStateManager:
         if sheet.status not in [CharacterStatus.DRAFT, CharacterStatus.REJECTED]:
             return False
         
-        sheet.status = CharacterStatus.PENDING
+        self._set_sheet_status(sheet, CharacterStatus.PENDING)
         sheet.updated_at = datetime.now()
         
-        await self._notify_change("sheet_pending", {"sheet": self._serialize_sheet(sheet)})
+        await self._notify_change("sheet_pending", {"sheet": self._sheet_changed(sheet)})
         return True
     
     async def approve_character_sheet(self, sheet_id: str) -> bool:
@@ -187,11 +360,11 @@ class GameStateManager:
         if not sheet or sheet.status != CharacterStatus.PENDING:
             return False
         
-        sheet.status = CharacterStatus.APPROVED
+        self._set_sheet_status(sheet, CharacterStatus.APPROVED)
         sheet.approved_at = datetime.now()
         sheet.rejection_reason = None
         
-        await self._notify_change("sheet_approved", {"sheet": self._serialize_sheet(sheet)})
+        await self._notify_change("sheet_approved", {"sheet": self._sheet_changed(sheet)})
         return True
     
     async def reject_character_sheet(self, sheet_id: str, reason: str = "") -> bool:
@@ -200,12 +373,12 @@ class GameStateManager:
         if not sheet or sheet.status != CharacterStatus.PENDING:
             return False
         
-        sheet.status = CharacterStatus.REJECTED
+        self._set_sheet_status(sheet, CharacterStatus.REJECTED)
         sheet.rejection_reason = reason
         sheet.updated_at = datetime.now()
         
         await self._notify_change("sheet_rejected", {
-            "sheet": self._serialize_sheet(sheet),
+            "sheet": self._sheet_changed(sheet),
             "reason": reason
         })
         return True
@@ -219,14 +392,14 @@ class GameStateManager:
         # Asignar marcador y token visual
         sheet.marker_id = marker_id
         sheet.token_visual = token_visual
-        sheet.status = CharacterStatus.IN_GAME
+        self._set_sheet_status(sheet, CharacterStatus.IN_GAME)
         
         # Quitar de available_markers si estaba ahí (legacy ArUco)
         if marker_id in self.state.available_markers:
             self.state.available_markers.remove(marker_id)
         
         await self._notify_change("token_assigned", {
-            "sheet": self._serialize_sheet(sheet),
+            "sheet": self._sheet_changed(sheet),
             "marker_id": marker_id,
             "token_visual": token_visual
         })
@@ -234,51 +407,76 @@ class GameStateManager:
     
     def get_player_sheet(self, player_id: str) -> Optional[CharacterSheet]:
         """Obtiene la ficha de un jugador"""
-        for sheet in self.state.character_sheets.values():
-            if sheet.player_id == player_id:
-                return sheet
-        return None
+        sheet_id = self._sheet_by_player.get(player_id)
+        return self.state.character_sheets.get(sheet_id) if sheet_id else None
     
     def get_pending_sheets(self) -> List[CharacterSheet]:
         """Obtiene todas las fichas pendientes de aprobación"""
-        return [s for s in self.state.character_sheets.values() if s.status == CharacterStatus.PENDING]
+        sheets = self.state.character_sheets
+        return [sheets[sheet_id] for sheet_id in self._pending_ids]
     
     def get_approved_sheets(self) -> List[CharacterSheet]:
         """Obtiene todas las fichas aprobadas (con o sin token)"""
-        return [s for s in self.state.character_sheets.values() 
-                if s.status in [CharacterStatus.APPROVED, CharacterStatus.IN_GAME]]
+        sheets = self.state.character_sheets
+        return [sheets[sheet_id] for sheet_id in self._approved_ids]
+    
+    def _set_sheet_status(self, sheet: CharacterSheet, status: CharacterStatus):
+        """Cambia el estado de una ficha manteniendo los índices por estado"""
+        sheet.status = status
+        self._pending_ids.pop(sheet.id, None)
+        if status == CharacterStatus.PENDING:
+            self._pending_ids[sheet.id] = None
+        if status in (CharacterStatus.APPROVED, CharacterStatus.IN_GAME):
+            self._approved_ids[sheet.id] = None
+        else:
+            self._approved_ids.pop(sheet.id, None)
     
     def _serialize_sheet(self, sheet: CharacterSheet) -> dict:
-        """Serializa una ficha para enviar por WebSocket"""
-        data = sheet.model_dump()
-        # Convertir datetimes a ISO strings
-        for key in ['created_at', 'updated_at', 'approved_at']:
-            if data.get(key):
-                data[key] = data[key].isoformat() if hasattr(data[key], 'isoformat') else str(data[key])
-        
-        # Añadir campos para compatibilidad con el admin panel
-        data['system_id'] = data.get('game_system')  # alias para el frontend
-        data['character_name'] = sheet.data.get('name', sheet.data.get('mech_name', 'Sin nombre'))
-        data['submitted_at'] = data.get('updated_at')  # para ordenamiento en pendientes
-        
+        """
+        Serializa una ficha para enviar por WebSocket. El dict se cachea hasta
+        la siguiente modificación de la ficha: tratarlo como de solo lectura.
+        """
+        data = self._sheet_json.get(sheet.id)
+        if data is None:
+            # datetimes como ISO strings; system_id, character_name y submitted_at
+            # son computed fields del modelo
+            data = sheet.model_dump(mode="json")
+            self._sheet_json[sheet.id] = data
         return data
     
+    def _sheet_changed(self, sheet: CharacterSheet) -> dict:
+        """Descarta la serialización cacheada de una ficha modificada y la rehace"""
+        self._sheet_json.pop(sheet.id, None)
+        return self._serialize_sheet(sheet)
+    
+    def _serialize_character(self, char: Character) -> dict:
+        """
+        Serializa un personaje. Sin caché: los personajes cambian en cada
+        update de marcador y se modifican desde varios sitios.
+        """
+        return char.model_dump(mode="json")
+    
+    def _serialize_player(self, player: Player) -> dict:
+        """Serializa un jugador"""
+        return player.model_dump(mode="json")
+    
     # === Gestión de Jugadores ===
     
     async def add_player(self, player_id: str, name: str, role: PlayerRole = PlayerRole.PLAYER) -> Player:
         """Añade un nuevo jugador a la sesión"""
         player = Player(id=player_id, name=name, role=role)
         self.state.players[player_id] = player
-        await self._notify_change("player_joined", {"player": self._serialize_datetime(player.model_dump())})
+        await self._notify_change("player_joined", {"player": self._serialize_player(player)})
         return player
     
     async def remove_player(self, player_id: str):
         """Elimina un jugador de la sesión"""
         if player_id in self.state.players:
             player = self.state.players.pop(player_id)
-            # Liberar el personaje que controlaba
-            for char in self.state.characters.values():
-                if char.owner_id == player_id:
+            # Liberar los personajes que controlaba
+            for char_id in self._chars_by_owner.pop(player_id, ()):
+                char = self.state.characters.get(char_id)
+                if char and char.owner_id == player_id:
                     char.owner_id = None
             await self._notify_change("player_left", {"player_id": player_id, "name": player.name})
     
@@ -291,7 +489,10 @@ class GameStateManager:
         
         # Desasignar de otro jugador si estaba asignado
         char = self.state.characters[character_id]
+        if char.owner_id and char.owner_id != player_id:
+            self._chars_by_owner.get(char.owner_id, set()).discard(character_id)
         char.owner_id = player_id
+        self._chars_by_owner.setdefault(player_id, set()).add(character_id)
         self.state.players[player_id].character_id = character_id
         return True
     
@@ -302,15 +503,16 @@ class GameStateManager:
         marker_id = marker.marker_id
         
         # Ver si ya existe
-        existing = None
-        for char_id, char in self.state.characters.items():
-            if char.marker_id == marker_id:
-                existing = char
-                break
+        existing = self.get_character_by_marker(marker_id)
         
         if existing:
             # Actualizar posición
             existing.position = marker.position
+            # Ignorar el temblor de la detección: solo notificar movimientos reales
+            last = self._last_broadcast_pos.get(existing.id)
+            if last is not None and _is_small_move(last, marker.position):
+                return existing
+            self._last_broadcast_pos[existing.id] = marker.position
             await self._notify_change("character_update", {
                 "character_id": existing.id,
                 "position": marker.position.model_dump()
@@ -323,7 +525,7 @@ class GameStateManager:
             return None
         
         template = self.character_templates[marker_id]
-        char_id = f"char_{marker_id}_{uuid.uuid4().hex[:6]}"
+        char_id = f"char_{marker_id}_{secrets.token_hex(3)}"
         
         character = Character(
             id=char_id,
@@ -341,36 +543,81 @@ class GameStateManager:
         )
         
         self.state.characters[char_id] = character
+        self._char_by_marker[marker_id] = char_id
+        self._last_broadcast_pos[char_id] = marker.position
         self.cooldowns[char_id] = {}
         
-        await self._notify_change("character_added", {"character": character.model_dump()})
+        await self._notify_change("character_added", {"character": self._serialize_character(character)})
         print(f"✅ Personaje añadido: {character.name} (marker {marker_id})")
         
         return character
     
     async def remove_character_by_marker(self, marker_id: int):
         """Elimina un personaje cuando su marcador desaparece"""
-        to_remove = None
-        for char_id, char in self.state.characters.items():
-            if char.marker_id == marker_id:
-                to_remove = char_id
-                break
-        
-        if to_remove:
-            char = self.state.characters.pop(to_remove)
-            if to_remove in self.cooldowns:
-                del self.cooldowns[to_remove]
+        to_remove = self._char_by_marker.pop(marker_id, None)
+        char = self.remove_character(to_remove) if to_remove else None
+        if char is not None:
             await self._notify_change("character_removed", {
                 "character_id": to_remove,
                 "name": char.name
             })
     
+    def add_character(self, character: Character) -> Character:
+        """
+        Registra un personaje creado fuera del flujo de marcadores (display
+        táctil). El llamador notifica el alta; si ya existía uno con ese id,
+        se reemplaza.
+        """
+        if character.id in self.state.characters:
+            self.remove_character(character.id)
+        self.state.characters[character.id] = character
+        if character.marker_id is not None:
+            self._char_by_marker[character.marker_id] = character.id
+        if character.owner_id:
+            self._chars_by_owner.setdefault(character.owner_id, set()).add(character.id)
+        return character
+    
+    def remove_character(self, char_id: str) -> Optional[Character]:
+        """
+        Elimina un personaje y todo lo asociado (índices, cooldowns, filtro de temblor).
+        El llamador notifica la baja.
+        """
+        char = self.state.characters.pop(char_id, None)
+        if char is None:
+            return None
+        if char.marker_id is not None and self._char_by_marker.get(char.marker_id) == char_id:
+            del self._char_by_marker[char.marker_id]
+        if char.owner_id:
+            self._chars_by_owner.get(char.owner_id, set()).discard(char_id)
+        self.cooldowns.pop(char_id, None)
+        self._last_broadcast_pos.pop(char_id, None)
+        return char
+    
+    def move_character(self, char_id: str, x: float, y: float,
+                       rotation: float = 0.0) -> Optional[Character]:
+        """
+        Mueve un personaje a mano (display táctil). El llamador notifica el
+        cambio; aquí se reinicia la referencia del filtro de temblor, para que
+        el siguiente update del marcador se notifique aunque se mueva poco.
+        """
+        char = self.state.characters.get(char_id)
+        if char is None:
+            return None
+        char.position = Position(x=x, y=y, rotation=rotation)
+        self._last_broadcast_pos.pop(char_id, None)
+        return char
+    
     def get_character_by_marker(self, marker_id: int) -> Optional[Character]:
         """Obtiene un personaje por su ID de marcador"""
-        for char in self.state.characters.values():
-            if char.marker_id == marker_id:
-                return char
-        return None
+        char_id = self._char_by_marker.get(marker_id)
+        if char_id is None:
+            return None
+        char = self.state.characters.get(char_id)
+        if char is None or char.marker_id != marker_id:
+            # El personaje se eliminó por otra vía (p. ej. desde el display)
+            del self._char_by_marker[marker_id]
+            return None
+        return char
     
     # === Sistema de Combate ===
     
@@ -382,6 +629,7 @@ class GameStateManager:
         # Iniciativa simple: orden de adición por ahora
         # TODO: Implementar tiradas de iniciativa
         self.state.initiative_order = list(self.state.characters.keys())
+        self.state.active_initiative_idx = 0
         
         if self.state.initiative_order:
             self.state.active_character_id = self.state.initiative_order[0]
@@ -396,6 +644,7 @@ class GameStateManager:
         """Finaliza el combate"""
         self.state.is_combat = False
         self.state.initiative_order = []
+        self.state.active_initiative_idx = 0
         self.state.active_character_id = None
         
         await self._notify_change("combat_end", {})
@@ -405,22 +654,15 @@ class GameStateManager:
         if not self.state.is_combat or not self.state.initiative_order:
             return
         
-        # Reducir cooldowns del personaje actual
-        current_char = self.state.active_character_id
-        if current_char in self.cooldowns:
-            for ability_id in list(self.cooldowns[current_char].keys()):
-                self.cooldowns[current_char][ability_id] -= 1
-                if self.cooldowns[current_char][ability_id] <= 0:
-                    del self.cooldowns[current_char][ability_id]
-        
-        # Siguiente personaje
-        current_idx = self.state.initiative_order.index(self.state.active_character_id)
-        next_idx = (current_idx + 1) % len(self.state.initiative_order)
+        # Siguiente personaje (los cooldowns guardan la ronda de expiración: nada que descontar)
+        next_idx = (self.state.active_initiative_idx + 1) % len(self.state.initiative_order)
         
         # Si volvemos al inicio, nuevo turno
         if next_idx == 0:
             self.state.current_turn += 1
+            self._round_clock += 1
         
+        self.state.active_initiative_idx = next_idx
         self.state.active_character_id = self.state.initiative_order[next_idx]
         
         await self._notify_change("turn_change", {
@@ -454,8 +696,8 @@ class GameStateManager:
             return ActionResult(success=False, message=f"{character.name} no tiene esa habilidad")
         
         # Verificar cooldown
-        if character_id in self.cooldowns and ability_id in self.cooldowns[character_id]:
-            turns_left = self.cooldowns[character_id][ability_id]
+        turns_left = self.cooldowns[character_id].get(ability_id, 0) - self._round_clock
+        if turns_left > 0:
             return ActionResult(success=False, message=f"Habilidad en cooldown ({turns_left} turnos)")
         
         # Verificar maná
@@ -484,9 +726,7 @@ class GameStateManager:
         
         # Iniciar cooldown
         if ability.cooldown > 0:
-            if character_id not in self.cooldowns:
-                self.cooldowns[character_id] = {}
-            self.cooldowns[character_id][ability_id] = ability.cooldown
+            self.cooldowns[character_id][ability_id] = self._round_clock + ability.cooldown
             result.cooldown_started = ability_id
         
         # Registrar acción
@@ -524,50 +764,25 @@ class GameStateManager:
             return []
         
         character = self.state.characters[character_id]
+        cooldowns = self.cooldowns[character_id]
+        clock = self._round_clock
+        mana = character.mana
         available = []
         
         for ability_id in character.abilities:
-            if ability_id not in self.abilities:
+            base = self._ability_static.get(ability_id)
+            if base is None:
                 continue
             
-            ability = self.abilities[ability_id]
-            cooldown_left = 0
-            
-            if character_id in self.cooldowns:
-                cooldown_left = self.cooldowns[character_id].get(ability_id, 0)
-            
-            can_use = (
-                cooldown_left == 0 and
-                character.mana >= ability.mana_cost
-            )
-            
+            cooldown_left = max(0, cooldowns.get(ability_id, 0) - clock)
             available.append({
-                "id": ability_id,
-                "name": ability.name,
-                "description": ability.description,
-                "mana_cost": ability.mana_cost,
-                "damage": ability.damage,
-                "heal": ability.heal,
-                "range": ability.range,
-                "aoe": ability.aoe,
-                "cooldown": ability.cooldown,
+                **base,
                 "cooldown_left": cooldown_left,
-                "can_use": can_use,
-                "effect_type": ability.effect_type
+                "can_use": cooldown_left == 0 and mana >= base["mana_cost"]
             })
         
         return available
     
-    def _serialize_datetime(self, obj):
-        """Convierte datetime a string ISO para JSON"""
-        if hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        elif isinstance(obj, dict):
-            return {k: self._serialize_datetime(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._serialize_datetime(item) for item in obj]
-        return obj
-    
     # === Gestión de Mapas ===
     
     async def get_all_maps(self) -> List[dict]:
@@ -575,24 +790,42 @@ class GameStateManager:
         maps_dir = self.config_path / "maps"
         maps_dir.mkdir(exist_ok=True)
         
-        maps = []
-        for map_file in maps_dir.glob("*.json"):
+        # El mtime del directorio no cambia al editar un mapa en su sitio:
+        # comparar el de cada fichero y releer solo los que han cambiado
+        mtimes = await asyncio.to_thread(_scan_maps_dir, maps_dir)
+        index = self._maps_index or {}
+        if self._maps_index is not None and mtimes == self._maps_mtimes:
+            return [dict(m) for m in index.values()]
+        
+        def _load_one(map_id: str) -> Optional[dict]:
+            map_file = maps_dir / f"{map_id}.json"
             try:
-                with open(map_file, 'r', encoding='utf-8') as f:
-                    map_data = json.load(f)
-                    maps.append({
-                        "id": map_file.stem,
-                        "name": map_data.get("name", map_file.stem),
-                        "width": map_data.get("width", 20),
-                        "height": map_data.get("height", 15),
-                        "type": map_data.get("type", "custom"),
-                        "created_at": map_data.get("created_at"),
-                        "updated_at": map_data.get("updated_at")
-                    })
+                return _map_summary(map_id, _read_json_file(map_file))
             except Exception as e:
                 print(f"⚠️ Error leyendo mapa {map_file}: {e}")
+                return None
         
-        return maps
+        changed = [map_id for map_id, mtime_ns in mtimes.items()
+                   if map_id not in index or self._maps_mtimes.get(map_id) != mtime_ns]
+        # Lectura en hilos para no bloquear el event loop
+        results = await asyncio.gather(*(asyncio.to_thread(_load_one, map_id) for map_id in changed))
+        
+        new_index = {map_id: index[map_id] for map_id in mtimes if map_id in index}
+        new_index.update((map_id, m) for map_id, m in zip(changed, results) if m is not None)
+        self._maps_index = new_index
+        self._maps_mtimes = {map_id: mtimes[map_id] for map_id in new_index}
+        return [dict(m) for m in new_index.values()]
+    
+    def _update_maps_index(self, map_file: Path, map_id: str, map_data: Optional[dict]):
+        """Aplica un guardado/borrado propio al listado sin volver a escanear"""
+        if self._maps_index is None:
+            return
+        if map_data is None:
+            self._maps_index.pop(map_id, None)
+            self._maps_mtimes.pop(map_id, None)
+        else:
+            self._maps_index[map_id] = _map_summary(map_id, map_data)
+            self._maps_mtimes[map_id] = map_file.stat().st_mtime_ns
     
     async def get_map(self, map_id: str) -> Optional[dict]:
         """Obtiene un mapa específico"""
@@ -601,8 +834,7 @@ class GameStateManager:
             return None
         
         try:
-            with open(map_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return await asyncio.to_thread(_read_json_file, map_file)
         except Exception as e:
             print(f"⚠️ Error leyendo mapa {map_id}: {e}")
             return None
@@ -613,7 +845,7 @@ class GameStateManager:
         maps_dir.mkdir(exist_ok=True)
         
         # Generar ID si no tiene
-        map_id = map_data.get("id") or str(uuid.uuid4())[:8]
+        map_id = map_data.get("id") or secrets.token_hex(4)
         map_data["id"] = map_id
         
         # Timestamps
@@ -624,8 +856,8 @@ class GameStateManager:
         
         # Guardar
         map_file = maps_dir / f"{map_id}.json"
-        with open(map_file, 'w', encoding='utf-8') as f:
-            json.dump(map_data, f, indent=2, ensure_ascii=False)
+        await asyncio.to_thread(_write_json_file, map_file, map_data)
+        self._update_maps_index(map_file, map_id, map_data)
         
         # Notificar cambio
         await self._notify_change("map_saved", {"map_id": map_id, "name": map_data.get("name", "")})
@@ -634,9 +866,11 @@ class GameStateManager:
     
     async def delete_map(self, map_id: str) -> bool:
         """Elimina un mapa"""
-        map_file = self.config_path / "maps" / f"{map_id}.json"
+        maps_dir = self.config_path / "maps"
+        map_file = maps_dir / f"{map_id}.json"
         if map_file.exists():
-            map_file.unlink()
+            await asyncio.to_thread(map_file.unlink, True)
+            self._update_maps_index(map_file, map_id, None)
             await self._notify_change("map_deleted", {"map_id": map_id})
             return True
         return False
@@ -666,20 +900,24 @@ class GameStateManager:
                 "is_combat": bool(self.state.is_combat),
                 "active_character_id": self.state.active_character_id,
                 "characters": {
-                    str(cid): self._serialize_datetime(char.model_dump()) for cid, char in self.state.characters.items()
+                    str(cid): self._serialize_character(char) for cid, char in self.state.characters.items()
                 } if self.state.characters else {},
                 "character_sheets": {
                     str(sid): self._serialize_sheet(sheet) for sid, sheet in self.state.character_sheets.items()
                 } if self.state.character_sheets else {},
                 "players": {
-                    str(pid): self._serialize_datetime(player.model_dump()) for pid, player in self.state.players.items()
+                    str(pid): self._serialize_player(player) for pid, player in self.state.players.items()
                 } if self.state.players else {},
                 "initiative_order": list(self.state.initiative_order) if self.state.initiative_order else [],
                 "current_map": self.state.current_map,
                 "available_markers": self.state.available_markers,
                 "available_systems": self.get_available_systems(),
                 "recent_actions": [
-                    self._serialize_datetime(action.model_dump()) for action in (self.state.action_history[-10:] if self.state.action_history else [])
+                    action.model_dump(mode="json")
+                    for action in itertools.islice(
+                        self.state.action_history,
+                        max(0, len(self.state.action_history) - 10), None
+                    )
                 ]
             }
         except Exception as e:
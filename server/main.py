@@ -5,40 +5,82 @@ FastAPI server que coordina todo el sistema
 
 import asyncio
 import json
-import uuid
-from datetime import datetime
+import logging
+import logging.handlers
+import queue
+import secrets
+import threading
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 from typing import Optional, Dict
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Body
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+# pybase64 es opcional - base64 con SIMD (misma API que el módulo estándar)
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# orjson es opcional - parseo JSON más rápido (la serialización está en websocket_manager.dumps)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from .models import (
     WSMessageType, Position, DetectedMarker, PlayerRole,
     ActionRequest
 )
 from .game_state import GameStateManager
-from .websocket_manager import ConnectionManager
+from .websocket_manager import ConnectionManager, dumps
 from .camera_manager import camera_manager, CameraState
 from .frame_processor import frame_processor
 
 
 # === Utilidades ===
-def json_serial(obj):
-    """Serializador JSON para objetos que no son serializables por defecto"""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+async def send_json_safe(websocket: WebSocket, data: dict):
+    """Envía JSON de forma segura (mismo serializador que los broadcasts)"""
+    await websocket.send_text(dumps(data))
 
 
-async def send_json_safe(websocket: WebSocket, data: dict):
-    """Envía JSON de forma segura, manejando tipos como datetime"""
-    text = json.dumps(data, default=json_serial)
-    await websocket.send_text(text)
+# orjson.JSONDecodeError hereda de json.JSONDecodeError: los except existentes siguen valiendo
+parse_json = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+def read_json_file(path: Path):
+    """Lee un fichero JSON (orjson si está disponible)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Logging no bloqueante: los threads (p. ej. el de captura) solo encolan
+    el registro y un thread del QueueListener escribe en stderr.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:\t%(message)s"))
+    
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
 
 
 # === Configuración ===
@@ -68,19 +110,24 @@ async def on_game_state_change(change_type: str, data: dict):
 game_state.on_state_change(on_game_state_change)
 
 
+# Loop de eventos del servidor (el callback de marcadores llega desde el thread de captura)
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
 # Configurar callbacks del camera manager para broadcasting
 def on_markers_detected(markers: list):
-    """Callback cuando se detectan marcadores"""
-    import asyncio
+    """Callback cuando cambian los marcadores (ya limitado a stream_fps)"""
     try:
-        # Obtener miniaturas con información de jugador
+        if _main_loop is None or not _main_loop.is_running():
+            return
+        # El display reemplaza la lista completa: enviar todas las visibles
         miniatures = camera_manager.get_visible_miniatures()
-        # Programar el broadcast en el loop de eventos
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.create_task(ws_manager.send_miniature_positions(miniatures))
+        # Programar el broadcast en el loop de eventos desde el thread de captura
+        asyncio.run_coroutine_threadsafe(
+            ws_manager.send_miniature_positions(miniatures), _main_loop
+        )
     except Exception as e:
-        print(f"Error en callback de marcadores: {e}")
+        logger.error(f"Error en callback de marcadores: {e}")
 
 camera_manager.set_callbacks(on_markers_detected=on_markers_detected)
 
@@ -89,10 +136,16 @@ camera_manager.set_callbacks(on_markers_detected=on_markers_detected)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestión del ciclo de vida de la app"""
+    global _main_loop
+    _main_loop = asyncio.get_running_loop()
+    log_listener = setup_logging()
     print("🎲 MesaRPG iniciando...")
     print(f"📁 Directorio base: {BASE_DIR}")
+    # Cargar YOLO en segundo plano: el servidor responde mientras tanto
+    _main_loop.run_in_executor(None, frame_processor.load_model)
     yield
     print("🎲 MesaRPG cerrando...")
+    log_listener.stop()
 
 
 # === App FastAPI ===
@@ -337,14 +390,14 @@ async def get_connections():
 @app.get("/api/characters")
 async def get_characters():
     """Obtiene todos los personajes"""
-    return {cid: char.model_dump() for cid, char in game_state.state.characters.items()}
+    return {cid: game_state._serialize_character(char) for cid, char in game_state.state.characters.items()}
 
 @app.get("/api/characters/{character_id}")
 async def get_character(character_id: str):
     """Obtiene un personaje específico"""
     if character_id not in game_state.state.characters:
         raise HTTPException(status_code=404, detail="Personaje no encontrado")
-    return game_state.state.characters[character_id].model_dump()
+    return game_state._serialize_character(game_state.state.characters[character_id])
 
 @app.get("/api/characters/{character_id}/abilities")
 async def get_character_abilities(character_id: str):
@@ -458,21 +511,23 @@ async def select_game_system(data: dict):
 @app.get("/api/sheets")
 async def get_all_sheets(status: Optional[str] = None, player_id: Optional[str] = None):
     """Obtiene fichas de personaje, opcionalmente filtradas por estado o jugador"""
-    sheets = list(game_state.state.character_sheets.values())
-    
-    # Filtrar por jugador si se especifica
-    if player_id:
-        sheets = [s for s in sheets if s.player_id == player_id]
-    
-    # Filtrar por estado si se especifica
-    if status:
-        if status == "approved":
-            # Incluir tanto 'approved' como 'in_game' para fichas aprobadas
-            sheets = [s for s in sheets if s.status.value in ["approved", "in_game"]]
-        else:
-            sheets = [s for s in sheets if s.status.value == status]
+    # Los estados con índice propio no necesitan recorrer todas las fichas
+    if status == "approved":
+        # Incluye tanto 'approved' como 'in_game'
+        sheets = game_state.get_approved_sheets()
+        status = None
+    elif status == "pending":
+        sheets = game_state.get_pending_sheets()
+        status = None
+    else:
+        sheets = game_state.state.character_sheets.values()
     
-    return [game_state._serialize_sheet(s) for s in sheets]
+    # Filtrar por jugador y estado en una sola pasada
+    return [
+        game_state._serialize_sheet(s) for s in sheets
+        if (not player_id or s.player_id == player_id)
+        and (not status or s.status.value == status)
+    ]
 
 @app.get("/api/sheets/pending")
 async def get_pending_sheets():
@@ -576,8 +631,7 @@ async def get_tiles():
     """Obtiene la biblioteca de tiles disponibles (genéricos)"""
     tiles_file = CONFIG_DIR / "tiles.json"
     if tiles_file.exists():
-        with open(tiles_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json_file(tiles_file)
     return {"categories": {}, "tiles": {}}
 
 @app.get("/api/tiles/{system_id}")
@@ -586,14 +640,12 @@ async def get_tiles_for_system(system_id: str):
     # Primero intentar cargar tiles específicos del sistema
     system_tiles_file = CONFIG_DIR / f"tiles_{system_id}.json"
     if system_tiles_file.exists():
-        with open(system_tiles_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json_file(system_tiles_file)
     
     # Fallback a tiles genéricos
     tiles_file = CONFIG_DIR / "tiles.json"
     if tiles_file.exists():
-        with open(tiles_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json_file(tiles_file)
     
     return {"categories": {}, "tiles": {}}
 
@@ -665,7 +717,7 @@ async def add_test_character(marker_id: int = 1, name: str = "Test Character"):
     character = await game_state.add_character_from_marker(marker)
     
     if character:
-        return {"status": "success", "character": character.model_dump()}
+        return {"status": "success", "character": game_state._serialize_character(character)}
     else:
         return {"status": "error", "message": "No hay template para ese marker_id"}
 
@@ -674,9 +726,12 @@ async def add_test_character(marker_id: int = 1, name: str = "Test Character"):
 async def clear_characters():
     """Elimina todos los personajes (para desarrollo)"""
     for char_id in list(game_state.state.characters.keys()):
-        await game_state.remove_character_by_marker(
-            game_state.state.characters[char_id].marker_id
-        )
+        char = game_state.remove_character(char_id)
+        if char is not None:
+            await ws_manager.broadcast_all({
+                "type": "character_removed",
+                "payload": {"character_id": char_id, "name": char.name}
+            })
     return {"status": "success", "message": "Todos los personajes eliminados"}
 
 
@@ -743,6 +798,14 @@ async def get_camera_frame():
                 return {"frame": frame}
         raise HTTPException(status_code=404, detail="No hay frame disponible")
 
+@app.get("/api/camera/frame.jpg")
+async def get_camera_frame_jpeg():
+    """Obtiene el frame actual como JPEG binario (sin base64)"""
+    frame = camera_manager.get_current_frame_bytes()
+    if frame:
+        return Response(content=frame, media_type="image/jpeg")
+    raise HTTPException(status_code=404, detail="No hay frame disponible")
+
 @app.get("/api/camera/miniatures")
 async def get_all_miniatures():
     """Obtiene todas las miniaturas trackeadas"""
@@ -907,7 +970,7 @@ async def websocket_display(websocket: WebSocket):
         while True:
             data = await websocket.receive_text()
             try:
-                message = json.loads(data)
+                message = parse_json(data)
                 
                 # Responder a ping con pong para mantener conexión viva
                 if message.get("type") == "ping":
@@ -937,14 +1000,14 @@ async def handle_display_message(message: dict, websocket: WebSocket):
         char_id = payload.get("character_id")
         position = payload.get("position", {})
         
-        if char_id and char_id in game_state.state.characters:
-            char = game_state.state.characters[char_id]
-            char.position = Position(
-                x=position.get("x", 0),
-                y=position.get("y", 0),
-                rotation=position.get("rotation", 0)
-            )
-            
+        char = game_state.move_character(
+            char_id,
+            x=position.get("x", 0),
+            y=position.get("y", 0),
+            rotation=position.get("rotation", 0)
+        ) if char_id else None
+        
+        if char is not None:
             # Notificar a todos los clientes
             await ws_manager.broadcast_all({
                 "type": "character_update",
@@ -957,7 +1020,7 @@ async def handle_display_message(message: dict, websocket: WebSocket):
     
     elif msg_type == "character_create":
         # Crear un nuevo personaje desde el display táctil
-        char_id = payload.get("id", f"touch_{uuid.uuid4().hex[:6]}")
+        char_id = payload.get("id", f"touch_{secrets.token_hex(3)}")
         name = payload.get("name", "Aventurero")
         char_class = payload.get("character_class", "Guerrero")
         position = payload.get("position", {"x": 100, "y": 100})
@@ -983,20 +1046,20 @@ async def handle_display_message(message: dict, websocket: WebSocket):
             )
         )
         
-        game_state.state.characters[char_id] = character
+        game_state.add_character(character)
         
         # Notificar a todos los clientes
         await ws_manager.broadcast_all({
             "type": "character_added",
-            "payload": {"character": character.model_dump()}
+            "payload": {"character": game_state._serialize_character(character)}
         })
         print(f"✨ Personaje creado desde display: {name} en ({position.get('x')}, {position.get('y')})")
     
     elif msg_type == "character_remove":
         # Eliminar un personaje
         char_id = payload.get("character_id")
-        if char_id and char_id in game_state.state.characters:
-            char = game_state.state.characters.pop(char_id)
+        char = game_state.remove_character(char_id) if char_id else None
+        if char is not None:
             await ws_manager.broadcast_all({
                 "type": "character_removed",
                 "payload": {
@@ -1010,7 +1073,7 @@ async def handle_display_message(message: dict, websocket: WebSocket):
 async def websocket_mobile(websocket: WebSocket, player_id: str = Query(None), name: str = Query("Jugador")):
     """WebSocket para dispositivos móviles de jugadores"""
     if not player_id:
-        player_id = str(uuid.uuid4())[:8]
+        player_id = secrets.token_hex(4)
     
     await ws_manager.connect_mobile(websocket, player_id)
     await game_state.add_player(player_id, name, PlayerRole.PLAYER)
@@ -1033,7 +1096,7 @@ async def websocket_mobile(websocket: WebSocket, player_id: str = Query(None), n
         while True:
             data = await websocket.receive_text()
             try:
-                message = json.loads(data)
+                message = parse_json(data)
                 await handle_mobile_message(player_id, message, websocket)
             except json.JSONDecodeError as e:
                 print(f"⚠️ Error parseando mensaje de mobile {player_id}: {e}")
@@ -1084,55 +1147,62 @@ async def websocket_camera(websocket: WebSocket):
     
     Usa un buffer de frame único para evitar acumulación - siempre procesa
     el frame más reciente, descartando frames antiguos.
+    
+    Los frames pueden llegar como JPEG binario (respuesta: JSON con los tracks
+    seguido del JPEG binario) o, por compatibilidad, como JSON con base64.
     """
     await ws_manager.connect_camera(websocket)
     
-    # Buffer de frame único - siempre guarda el más reciente
-    frame_buffer = {"frame": None, "timestamp": None}
-    processing_lock = asyncio.Lock()
-    is_processing = False
+    # Buffer de frame único - los frames nuevos sobrescriben al pendiente y un
+    # único consumidor procesa siempre el más reciente (nunca uno obsoleto)
+    frame_buffer = {"frame": None, "timestamp": None, "binary": False, "preview": True}
+    frame_ready = asyncio.Event()
     
-    async def process_latest_frame():
-        """Procesa el frame más reciente del buffer"""
-        nonlocal is_processing
-        
-        async with processing_lock:
-            if frame_buffer["frame"] is None:
-                return
+    async def frame_consumer():
+        """Procesa el frame más reciente del buffer cada vez que llega uno"""
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
             
-            is_processing = True
-            frame_base64 = frame_buffer["frame"]
+            frame_bytes = frame_buffer["frame"]
             timestamp = frame_buffer["timestamp"]
+            binary = frame_buffer["binary"]
             # Limpiar buffer inmediatamente
             frame_buffer["frame"] = None
             frame_buffer["timestamp"] = None
-        
-        try:
-            # Procesar en thread pool para no bloquear
-            loop = asyncio.get_event_loop()
-            processed_frame, tracks = await loop.run_in_executor(
-                None, frame_processor.process_frame, frame_base64
-            )
-            
-            # Enviar posiciones de miniaturas al display
-            if tracks:
-                await ws_manager.send_miniature_positions(tracks)
+            if frame_bytes is None:
+                continue
             
-            # Enviar resultado al admin
-            await send_json_safe(websocket, {
-                "type": "processed_frame",
-                "payload": {
-                    "frame": processed_frame,
+            try:
+                # Procesar en el pipeline de frames para no bloquear
+                # Sin preview visible en el admin basta con los tracks (sin overlay ni JPEG)
+                processed_frame, tracks, frame_scale = await frame_processor.process_frame_async(
+                    frame_bytes, return_frame=frame_buffer["preview"]
+                )
+                
+                # Enviar posiciones de miniaturas al display
+                if tracks:
+                    await ws_manager.send_miniature_positions(tracks)
+                
+                # Enviar resultado al admin (scale: frame anotado / original)
+                payload = {
                     "detections": len(tracks),
                     "tracks": tracks,
+                    "scale": frame_scale,
                     "timestamp": timestamp
                 }
-            })
-        finally:
-            is_processing = False
-            # Si llegó otro frame mientras procesábamos, procesarlo
-            if frame_buffer["frame"] is not None:
-                asyncio.create_task(process_latest_frame())
+                if processed_frame is None:
+                    await send_json_safe(websocket, {"type": "processed_frame", "payload": payload})
+                elif binary:
+                    await send_json_safe(websocket, {"type": "processed_frame", "payload": payload})
+                    await websocket.send_bytes(processed_frame)
+                else:
+                    payload["frame"] = base64.b64encode(processed_frame).decode('utf-8')
+                    await send_json_safe(websocket, {"type": "processed_frame", "payload": payload})
+            except Exception as e:
+                print(f"⚠️ Error procesando frame de cámara: {e}")
+    
+    consumer_task = asyncio.create_task(frame_consumer())
     
     try:
         # Enviar estado inicial
@@ -1145,8 +1215,20 @@ async def websocket_camera(websocket: WebSocket):
         })
         
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(data.get("code", 1000))
+            
+            # === Frame del Admin como JPEG binario ===
+            if data.get("bytes") is not None:
+                # Guardar en buffer (sobrescribe cualquier frame anterior no procesado)
+                frame_buffer["frame"] = data["bytes"]
+                frame_buffer["timestamp"] = int(time.time() * 1000)
+                frame_buffer["binary"] = True
+                frame_ready.set()
+                continue
+            
+            message = parse_json(data["text"])
             msg_type = message.get("type", "")
             
             # Responder a ping
@@ -1154,19 +1236,21 @@ async def websocket_camera(websocket: WebSocket):
                 await websocket.send_json({"type": "pong"})
                 continue
             
-            # === Frame del Admin para procesar ===
+            # === Frame del Admin en base64 (compatibilidad) ===
             if msg_type == "frame":
                 payload = message.get("payload", {})
                 frame_base64 = payload.get("frame")
                 
                 if frame_base64:
                     # Guardar en buffer (sobrescribe cualquier frame anterior no procesado)
-                    frame_buffer["frame"] = frame_base64
+                    frame_buffer["frame"] = base64.b64decode(frame_base64, validate=False)
                     frame_buffer["timestamp"] = payload.get("timestamp")
-                    
-                    # Si no estamos procesando, iniciar procesamiento
-                    if not is_processing:
-                        asyncio.create_task(process_latest_frame())
+                    frame_buffer["binary"] = False
+                    frame_ready.set()
+            
+            # El admin muestra u oculta el feed procesado
+            elif msg_type == "set_preview":
+                frame_buffer["preview"] = bool(message.get("payload", {}).get("enabled", True))
             
             # Comandos de control
             elif msg_type == "camera_control":
@@ -1187,6 +1271,12 @@ async def websocket_camera(websocket: WebSocket):
                     "payload": {"success": True}
                 })
             
+            # === Frame actual de la cámara local como JPEG binario ===
+            elif msg_type == "get_frame":
+                frame_bytes = camera_manager.get_current_frame_bytes()
+                if frame_bytes:
+                    await websocket.send_bytes(frame_bytes)
+            
             # Solicitar estado
             elif msg_type == "get_status":
                 await send_json_safe(websocket, {
@@ -1199,6 +1289,8 @@ async def websocket_camera(websocket: WebSocket):
             
     except WebSocketDisconnect:
         ws_manager.disconnect_camera(websocket)
+    finally:
+        consumer_task.cancel()
 
 
 async def handle_camera_control(websocket: WebSocket, action: str, payload: dict):
@@ -1241,8 +1333,6 @@ async def handle_camera_control(websocket: WebSocket, action: str, payload: dict
 async def stream_ip_camera(websocket: WebSocket, ip_url: str):
     """Consume stream de cámara IP y envía frames procesados al admin"""
     import cv2
-    import base64
-    import time
     
     # Normalizar URL
     if not ip_url.startswith('http'):
@@ -1252,8 +1342,13 @@ async def stream_ip_camera(websocket: WebSocket, ip_url: str):
     
     print(f"📷 Conectando a cámara IP: {ip_url}")
     
+    loop = asyncio.get_running_loop()
+    cap = None
+    reader = None
+    stop_reader = threading.Event()  # Propio de este stream (el flag global se reutiliza)
     try:
-        cap = cv2.VideoCapture(ip_url)
+        # Abrir el stream bloquea (conexión HTTP): fuera del loop de eventos
+        cap = await loop.run_in_executor(None, cv2.VideoCapture, ip_url)
         cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimizar buffer
         
         if not cap.isOpened():
@@ -1273,37 +1368,61 @@ async def stream_ip_camera(websocket: WebSocket, ip_url: str):
         target_fps = 10
         frame_time = 1.0 / target_fps
         
+        # Un thread lee la cámara (cap.read bloquea) y deja siempre el último
+        # frame en un slot único: si el procesado va lento se salta frames
+        latest = {"frame": None}
+        frame_ready = asyncio.Event()
+        
+        def read_frames():
+            # El thread es dueño de cap: lo libera al salir, así nunca se libera
+            # con un cap.read() en curso (fuente RTSP/HTTP colgada)
+            try:
+                while camera_manager._ip_stream_active and not stop_reader.is_set():
+                    ret, frame = cap.read()
+                    if not ret:
+                        print("📷 Frame perdido, reintentando...")
+                        time.sleep(0.5)
+                        continue
+                    latest["frame"] = frame
+                    if not loop.is_closed():
+                        loop.call_soon_threadsafe(frame_ready.set)
+            finally:
+                cap.release()
+        
+        reader = threading.Thread(target=read_frames, name="ip-camera-reader", daemon=True)
+        reader.start()
+        
         while camera_manager._ip_stream_active:
+            await frame_ready.wait()
+            frame_ready.clear()
             start = time.time()
             
-            ret, frame = cap.read()
-            if not ret:
-                print("📷 Frame perdido, reintentando...")
-                await asyncio.sleep(0.5)
+            frame, latest["frame"] = latest["frame"], None
+            if frame is None:
                 continue
             
-            # Comprimir y codificar frame
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-            
-            # Procesar con YOLO + tracking
-            processed_frame, tracks = frame_processor.process_frame(frame_base64)
+            # Procesar con YOLO + tracking (fuera del loop de eventos); el frame
+            # ya está decodificado, no hace falta pasar por JPEG
+            processed_frame, tracks, frame_scale = await frame_processor.process_image_async(frame)
+            if processed_frame is None:
+                continue
             
             # Enviar posiciones de miniaturas al display
             if tracks:
                 await ws_manager.send_miniature_positions(tracks)
             
-            # Enviar al admin
+            # Enviar al admin (JSON con los tracks + JPEG binario)
             try:
                 await send_json_safe(websocket, {
                     "type": "processed_frame",
                     "payload": {
-                        "frame": processed_frame,
                         "detections": len(tracks),
                         "tracks": tracks,
+                        "scale": frame_scale,
                         "timestamp": int(time.time() * 1000)
                     }
                 })
+                await websocket.send_bytes(processed_frame)
             except Exception as e:
                 print(f"Error enviando frame: {e}")
                 break
@@ -1315,7 +1434,6 @@ async def stream_ip_camera(websocket: WebSocket, ip_url: str):
             if elapsed < frame_time:
                 await asyncio.sleep(frame_time - elapsed)
         
-        cap.release()
         print(f"📷 Cámara IP desconectada. Frames enviados: {frame_count}")
         
     except Exception as e:
@@ -1326,6 +1444,15 @@ async def stream_ip_camera(websocket: WebSocket, ip_url: str):
         })
     finally:
         camera_manager._ip_stream_active = False
+        stop_reader.set()
+        if reader is not None:
+            # Sin esperar indefinidamente: si cap.read() sigue bloqueado, el
+            # thread (daemon) liberará la cámara cuando vuelva
+            await loop.run_in_executor(None, reader.join, 2.0)
+            if reader.is_alive():
+                print("⚠️ Lector de cámara IP bloqueado - se liberará al volver de cap.read()")
+        elif cap is not None:
+            cap.release()
 
 
 async def handle_markers_update(markers: list):
@@ -1378,7 +1505,7 @@ async def websocket_admin(websocket: WebSocket):
         while True:
             data = await websocket.receive_text()
             try:
-                message = json.loads(data)
+                message = parse_json(data)
                 await handle_admin_message(websocket, message)
             except json.JSONDecodeError as e:
                 print(f"⚠️ Error parseando mensaje de admin: {e}")
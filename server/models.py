@@ -3,12 +3,17 @@ MesaRPG - Modelos de datos
 Define las estructuras de datos usadas en todo el sistema
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, computed_field
+from typing import Optional, List, Dict, Any, Deque
+from collections import deque
 from enum import Enum
 from datetime import datetime
 
 
+# Acciones que se conservan en el historial (las más antiguas se descartan)
+ACTION_HISTORY_LIMIT = 256
+
+
 class PlayerRole(str, Enum):
     """Roles de jugador"""
     PLAYER = "player"
@@ -59,6 +64,24 @@ class CharacterSheet(BaseModel):
     approved_at: Optional[datetime] = None
     rejection_reason: Optional[str] = None
     
+    # Campos derivados para el admin panel (se incluyen en model_dump)
+    @computed_field
+    @property
+    def system_id(self) -> str:
+        """Alias de game_system para el frontend"""
+        return self.game_system
+    
+    @computed_field
+    @property
+    def character_name(self) -> str:
+        return self.data.get('name', self.data.get('mech_name', 'Sin nombre'))
+    
+    @computed_field
+    @property
+    def submitted_at(self) -> datetime:
+        """Para ordenar las fichas pendientes"""
+        return self.updated_at
+    
     def get_name(self) -> str:
         """Obtiene el nombre del personaje de los datos"""
         return self.data.get("name", "Sin nombre")
@@ -178,9 +201,12 @@ class GameState(BaseModel):
     characters: Dict[str, Character] = {}
     character_sheets: Dict[str, CharacterSheet] = {}  # Fichas de personajes
     players: Dict[str, Player] = {}
-    action_history: List[GameAction] = []
+    action_history: Deque[GameAction] = Field(
+        default_factory=lambda: deque(maxlen=ACTION_HISTORY_LIMIT)
+    )
     is_combat: bool = False
     initiative_order: List[str] = []
+    active_initiative_idx: int = 0  # Posición de active_character_id en initiative_order
     current_map: str = "default"
     settings: Dict[str, Any] = {}
     available_markers: List[int] = list(range(1, 51))  # Marcadores disponibles (1-50)
@@ -3,6 +3,7 @@ MesaRPG - Sistema de Tracking Simple
 Tracker simplificado para miniaturas con detección OBB
 """
 
+import math
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass, field
@@ -41,10 +42,11 @@ class TrackedMini:
         """Media circular de ángulos"""
         if not self.orientation_history:
             return 0.0
-        angles = list(self.orientation_history)
-        sins = sum(np.sin(np.radians(a)) for a in angles)
-        coss = sum(np.cos(np.radians(a)) for a in angles)
-        return np.degrees(np.arctan2(sins, coss)) % 360
+        # Ángulos escalares: math evita el coste de despacho de los ufuncs de numpy
+        radians = [math.radians(a) for a in self.orientation_history]
+        sins = sum(math.sin(r) for r in radians)
+        coss = sum(math.cos(r) for r in radians)
+        return math.degrees(math.atan2(sins, coss)) % 360
     
     def to_dict(self) -> dict:
         return {
@@ -52,8 +54,8 @@ class TrackedMini:
             "class": "miniatura",
             "bbox": {"x1": self.bbox[0], "y1": self.bbox[1], "x2": self.bbox[2], "y2": self.bbox[3]},
             "center": {"x": self.center[0], "y": self.center[1]},
-            "confidence": round(self.confidence, 2),
-            "orientation": round(self.orientation, 1),
+            "confidence": self.confidence,
+            "orientation": self.orientation,
         }
 
 
@@ -69,10 +71,12 @@ class SimpleTracker:
         self.tracks: Dict[int, TrackedMini] = {}
         self.next_id = 1
     
-    def update(self, detections: List[dict]) -> List[TrackedMini]:
+    def update(self, detections: List[dict]) -> Tuple[List[TrackedMini], List[dict]]:
         """
         Actualiza tracks con nuevas detecciones.
         Usa matching simple por distancia de centros.
+        Devuelve los tracks y su versión serializable (to_dict), generadas en
+        la misma pasada.
         """
         # Incrementar missing count de todos los tracks
         for track in self.tracks.values():
@@ -81,35 +85,22 @@ class SimpleTracker:
         # Si no hay detecciones, limpiar y retornar
         if not detections:
             self._cleanup()
-            return list(self.tracks.values())
+            return self._snapshot()
         
-        # Para cada detección, buscar el track más cercano
-        used_tracks = set()
+        # Emparejar detecciones con tracks: matriz de distancias entre centros
+        # (detecciones x tracks) y asignación greedy de los pares más cercanos
+        assignment = self._match(detections)
         
-        for det in detections:
+        for det, track_id in zip(detections, assignment):
             cx = det["center"]["x"]
             cy = det["center"]["y"]
             bbox = (det["bbox"]["x1"], det["bbox"]["y1"], det["bbox"]["x2"], det["bbox"]["y2"])
             orientation = det.get("orientation", 0.0)
             confidence = det.get("confidence", 1.0)
             
-            # Buscar track más cercano
-            best_track_id = None
-            best_distance = float('inf')
-            
-            for tid, track in self.tracks.items():
-                if tid in used_tracks:
-                    continue
-                
-                dist = np.sqrt((cx - track.center[0])**2 + (cy - track.center[1])**2)
-                if dist < best_distance and dist < self.max_distance:
-                    best_distance = dist
-                    best_track_id = tid
-            
-            if best_track_id is not None:
+            if track_id is not None:
                 # Actualizar track existente
-                self.tracks[best_track_id].update(bbox, orientation, confidence)
-                used_tracks.add(best_track_id)
+                self.tracks[track_id].update(bbox, orientation, confidence)
             else:
                 # Crear nuevo track
                 new_track = TrackedMini(
@@ -120,13 +111,46 @@ class SimpleTracker:
                     confidence=confidence
                 )
                 self.tracks[self.next_id] = new_track
-                used_tracks.add(self.next_id)
                 self.next_id += 1
         
         # Limpiar tracks antiguos
         self._cleanup()
         
-        return list(self.tracks.values())
+        return self._snapshot()
+    
+    def _match(self, detections: List[dict]) -> List[Optional[int]]:
+        """
+        Devuelve, para cada detección, el id del track asignado (o None).
+        Se recorren los pares (detección, track) a menos de max_distance de
+        menor a mayor distancia; cada track y cada detección se usan una vez.
+        """
+        assignment: List[Optional[int]] = [None] * len(detections)
+        if not self.tracks:
+            return assignment
+        
+        track_ids = list(self.tracks.keys())
+        track_centers = np.array([self.tracks[tid].center for tid in track_ids], dtype=np.float32)
+        det_centers = np.array([(d["center"]["x"], d["center"]["y"]) for d in detections],
+                               dtype=np.float32)
+        dist = np.linalg.norm(det_centers[:, np.newaxis, :] - track_centers[np.newaxis, :, :], axis=2)
+        
+        det_idx, track_idx = np.nonzero(dist < self.max_distance)
+        order = np.argsort(dist[det_idx, track_idx], kind="stable")
+        used_tracks = set()
+        for d, t in zip(det_idx[order].tolist(), track_idx[order].tolist()):
+            if assignment[d] is None and t not in used_tracks:
+                assignment[d] = track_ids[t]
+                used_tracks.add(t)
+        return assignment
+    
+    def _snapshot(self) -> Tuple[List[TrackedMini], List[dict]]:
+        """Tracks actuales y sus dicts en una sola pasada"""
+        tracks = []
+        dicts = []
+        for track in self.tracks.values():
+            tracks.append(track)
+            dicts.append(track.to_dict())
+        return tracks, dicts
     
     def _cleanup(self):
         """Elimina tracks que no se han visto en mucho tiempo"""
@@ -10,6 +10,13 @@ from typing import Dict, Set, Optional, Any
 from fastapi import WebSocket, WebSocketDisconnect
 from .models import WSMessage, WSMessageType, PlayerRole
 
+# orjson es opcional - serialización JSON más rápida (numpy incluido)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 def json_serial(obj):
     """Serializador JSON para objetos que no son serializables por defecto"""
@@ -18,6 +25,15 @@ def json_serial(obj):
     return str(obj)
 
 
+def dumps(message: dict) -> str:
+    """Serializa un mensaje a JSON (orjson si está disponible)"""
+    if ORJSON_AVAILABLE:
+        # OPT_NON_STR_KEYS: claves int (p. ej. marker_id) como strings, igual que json
+        return orjson.dumps(message, default=json_serial,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(message, default=json_serial)
+
+
 class ConnectionManager:
     """
     Gestor de conexiones WebSocket.
@@ -82,12 +98,12 @@ class ConnectionManager:
         self.admin_connections.discard(websocket)
         print(f"🎮 Admin desconectado. Total: {len(self.admin_connections)}")
     
-    async def broadcast_to_displays(self, message: dict):
-        """Envía mensaje a todas las pantallas"""
+    async def broadcast_to_displays(self, message: dict, data: Optional[str] = None):
+        """Envía mensaje a todas las pantallas (data: mensaje ya serializado)"""
         if not self.display_connections:
             return
         
-        data = json.dumps(message, default=json_serial)
+        data = data or dumps(message)
         disconnected = []
         
         for ws in self.display_connections:
@@ -99,12 +115,13 @@ class ConnectionManager:
         for ws in disconnected:
             self.disconnect_display(ws)
     
-    async def broadcast_to_mobiles(self, message: dict, exclude: Optional[str] = None):
-        """Envía mensaje a todos los móviles"""
+    async def broadcast_to_mobiles(self, message: dict, exclude: Optional[str] = None,
+                                   data: Optional[str] = None):
+        """Envía mensaje a todos los móviles (data: mensaje ya serializado)"""
         if not self.mobile_connections:
             return
         
-        data = json.dumps(message, default=json_serial)
+        data = data or dumps(message)
         disconnected = []
         
         for player_id, ws in self.mobile_connections.items():
@@ -123,16 +140,16 @@ class ConnectionManager:
         ws = self.mobile_connections.get(player_id)
         if ws:
             try:
-                await ws.send_text(json.dumps(message, default=json_serial))
+                await ws.send_text(dumps(message))
             except Exception:
                 self.disconnect_mobile(ws)
     
-    async def broadcast_to_admins(self, message: dict):
-        """Envía mensaje a todos los admins"""
+    async def broadcast_to_admins(self, message: dict, data: Optional[str] = None):
+        """Envía mensaje a todos los admins (data: mensaje ya serializado)"""
         if not self.admin_connections:
             return
         
-        data = json.dumps(message, default=json_serial)
+        data = data or dumps(message)
         disconnected = []
         
         for ws in self.admin_connections:
@@ -145,11 +162,12 @@ class ConnectionManager:
             self.disconnect_admin(ws)
     
     async def broadcast_all(self, message: dict, exclude_player: Optional[str] = None):
-        """Envía mensaje a todos los clientes"""
+        """Envía mensaje a todos los clientes (se serializa una sola vez)"""
+        data = dumps(message)
         await asyncio.gather(
-            self.broadcast_to_displays(message),
-            self.broadcast_to_mobiles(message, exclude=exclude_player),
-            self.broadcast_to_admins(message)
+            self.broadcast_to_displays(message, data),
+            self.broadcast_to_mobiles(message, exclude=exclude_player, data=data),
+            self.broadcast_to_admins(message, data)
         )
     
     async def send_effect(self, effect_data: dict):
@@ -170,9 +188,10 @@ class ConnectionManager:
                 "timestamp": datetime.now().isoformat()
             }
         }
+        data = dumps(message)
         await asyncio.gather(
-            self.broadcast_to_displays(message),
-            self.broadcast_to_admins(message)
+            self.broadcast_to_displays(message, data),
+            self.broadcast_to_admins(message, data)
         )
     
     async def send_player_action_at_position(self, player_id: str, player_name: str, 
@@ -209,7 +228,7 @@ class ConnectionManager:
             "timestamp": datetime.now().isoformat()
         }
         try:
-            await websocket.send_text(json.dumps(message, default=json_serial))
+            await websocket.send_text(dumps(message))
         except:
             pass
     